@@ -6,8 +6,8 @@ from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 import io
 import base64
-from collections import Counter
-import re
+from review_store import ReviewStore
+from term_stats import TermStats, sentiment_label
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -15,16 +15,13 @@ CORS(app)  # Enable CORS for all routes
 # Initialize VADER sentiment analyzer
 analyzer = SentimentIntensityAnalyzer()
 
-def clean_text(text):
-    if not isinstance(text, str):
-        return ''
-    text = re.sub(r'[^\w\s]', '', text.lower())
-    return text
+# Review store shared with the scrapers; aggregates are precomputed on insert
+store = ReviewStore()
 
-def generate_word_cloud(text, title):
-    if not text.strip():
+def generate_word_cloud(frequencies, title):
+    if not frequencies:
         return None
-    wordcloud = WordCloud(width=800, height=400, background_color='white', min_font_size=10).generate(text)
+    wordcloud = WordCloud(width=800, height=400, background_color='white', min_font_size=10).generate_from_frequencies(frequencies)
     plt.figure(figsize=(8, 4))
     plt.imshow(wordcloud, interpolation='bilinear')
     plt.axis('off')
@@ -54,10 +51,11 @@ def upload_file():
         df['review_text'] = df['review_text'].astype(str)
         
         # Sentiment analysis
+        # Neutral-band scores fall back to the rating; reviews neither can label are 'neutral'
         sentiments = []
-        for text in df['review_text']:
+        for text, rating in zip(df['review_text'], df['rating']):
             score = analyzer.polarity_scores(text)['compound']
-            sentiments.append('positive' if score >= 0.05 else 'negative')
+            sentiments.append(sentiment_label(score, rating) or 'neutral')
         df['sentiment'] = sentiments
         
         # Rating pie chart data
@@ -82,20 +80,25 @@ def upload_file():
             'negative': f'{negative_reviews} reviews ({negative_reviews/len(df)*100:.1f}%) are negative, citing issues like irritation or insufficient hydration.'
         }
         
-        # Word clouds
-        positive_text = ' '.join(df[df['sentiment'] == 'positive']['review_text'].apply(clean_text))
-        negative_text = ' '.join(df[df['sentiment'] == 'negative']['review_text'].apply(clean_text))
+        # Distinguishing terms (log-odds, positive vs negative)
+        term_stats = TermStats.from_frame(df['review_text'], df['sentiment'])
+        positive_terms, negative_terms = term_stats.log_odds(n=100)
         
+        # Word clouds: distinctive terms, or plain frequencies when there is nothing to contrast
+        # (one sentiment only, or too few reviews for any term to reach min_count)
+        positive_weights = {t['term']: t['z'] for t in positive_terms} or dict(term_stats.top_terms('positive', 100))
+        negative_weights = {t['term']: -t['z'] for t in negative_terms} or dict(term_stats.top_terms('negative', 100))
         word_clouds = {
-            'positive': generate_word_cloud(positive_text, 'Positive Reviews Word Cloud'),
-            'negative': generate_word_cloud(negative_text, 'Negative Reviews Word Cloud')
+            'positive': generate_word_cloud(positive_weights, 'Positive Reviews Word Cloud'),
+            'negative': generate_word_cloud(negative_weights, 'Negative Reviews Word Cloud')
         }
         
-        # Interesting fact: Most frequent word in positive reviews
-        positive_words = positive_text.split()
-        word_counts = Counter(positive_words)
-        most_common_word, count = word_counts.most_common(1)[0]
-        interesting_fact = f"The word '{most_common_word}' appears {count} times in positive reviews, highlighting its frequent mention in user feedback about the lotion’s benefits."
+        # Interesting fact: Most distinctive term in positive reviews
+        if positive_terms:
+            top = positive_terms[0]
+            interesting_fact = f"The term '{top['term']}' appears {top['positive']} times in positive reviews versus {top['negative']} in negative ones, making it the most distinctive mention in user feedback about the lotion’s benefits."
+        else:
+            interesting_fact = "Not enough positive and negative reviews to compare their wording."
         
         return jsonify({
             'ratingPieChartData': rating_pie_chart_data,
@@ -107,6 +110,51 @@ def upload_file():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/products', methods=['GET'])
+def list_products():
+    return jsonify({'products': store.products()})
+
+@app.route('/products/<product>/stats', methods=['GET'])
+def product_stats(product):
+    stats = store.product_stats(product)
+    if stats is None:
+        return jsonify({'error': f'Unknown product: {product}'}), 404
+    return jsonify(stats)
+
+@app.route('/products/<product>/timeseries', methods=['GET'])
+def product_timeseries(product):
+    series = store.monthly_series(product, start=request.args.get('start'), end=request.args.get('end'))
+    return jsonify({'product': product, 'monthly': series})
+
+@app.route('/products/<product>/terms', methods=['GET'])
+def product_terms(product):
+    n = min(request.args.get('n', 20, type=int), 200)
+    positive_terms, negative_terms = store.term_stats(product).log_odds(n=n)
+    return jsonify({'product': product, 'positive': positive_terms, 'negative': negative_terms})
+
+@app.route('/duplicates', methods=['GET'])
+def duplicate_clusters():
+    clusters = store.duplicate_clusters(product=request.args.get('product'))
+    return jsonify({'count': len(clusters), 'clusters': clusters})
+
+@app.route('/search', methods=['GET'])
+def search_reviews():
+    try:
+        results = store.search(
+            request.args.get('q', ''),
+            mode=request.args.get('mode', 'any'),
+            products=request.args.getlist('product') or None,
+            min_rating=request.args.get('min_rating', type=int),
+            max_rating=request.args.get('max_rating', type=int),
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            limit=min(request.args.get('limit', 50, type=int), 500),
+            offset=request.args.get('offset', 0, type=int)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'query': request.args.get('q'), 'count': len(results), 'results': results})
+
 @app.route('/test', methods=['GET'])
 def test():
     return jsonify({'message': 'Flask server is running'})
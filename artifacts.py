@@ -0,0 +1,198 @@
+"""Bounded failure-artifact store for the scrapers.
+
+Replaces ad-hoc `page.screenshot(...)` / `page_content.html` dumps. Each scraper
+run gets its own directory under `artifacts/`, created on its first capture. The
+page HTML and screenshot are read on the crawl thread (Playwright pages can't be
+used from another thread), then gzip-compressed and written by a background thread.
+Soft reasons such as an empty results page store only the HTML, skipping the
+screenshot. Captures are rate limited, identical pages are stored once, and old
+runs are pruned by age and total size.
+"""
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from hashlib import sha1
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = os.environ.get('ARTIFACT_DIR', 'artifacts')
+
+# Expected outcomes (e.g. the last page of a filter) rather than breakage: HTML only
+SOFT_REASONS = {'no_reviews'}
+
+
+class ArtifactRecorder:
+    """Records failure screenshots and HTML for one scraper run, in <root>/<name>_<timestamp>_<pid>.
+
+    `max_per_minute` caps captures per reason, `max_total_bytes` and
+    `max_age_days` bound the whole artifact directory across runs.
+    """
+
+    def __init__(self, name='run', root=DEFAULT_ROOT, max_per_minute=6, max_total_bytes=200 * 1024 * 1024,
+                 max_age_days=7, screenshots=True, queue_size=32):
+        self.root = root
+        self.run_id = _safe(f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}")
+        self.run_dir = os.path.join(root, self.run_id)
+        self._run_dir_created = False
+        self.max_per_minute = max_per_minute
+        self.max_total_bytes = max_total_bytes
+        self.max_age_days = max_age_days
+        self.screenshots = screenshots
+        self.stats = Counter()
+        self._recent = {}  # reason -> deque of capture times
+        self._seen = set()  # content hashes already stored this run
+        self._seq = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._prune()
+        self._writer = threading.Thread(target=self._write_loop, name='artifact-writer', daemon=True)
+        self._writer.start()
+
+    def capture(self, page, reason, label=''):
+        """Capture the page's HTML (and screenshot) for a failure; returns the artifact id or None if skipped."""
+        now = time.time()
+        recent = self._recent.setdefault(reason, deque())
+        while recent and now - recent[0] > 60:
+            recent.popleft()
+        if len(recent) >= self.max_per_minute:
+            self.stats['rate_limited'] += 1
+            return None
+        try:
+            html = page.content()
+        except Exception as e:
+            logger.warning(f"Could not read page for artifact '{reason}': {e}")
+            self.stats['errors'] += 1
+            return None
+        digest = sha1(html.encode('utf-8', 'replace')).hexdigest()
+        if digest in self._seen:
+            self.stats['duplicates'] += 1
+            return None
+        self._seen.add(digest)
+        recent.append(now)
+        screenshot = None
+        if self.screenshots and reason not in SOFT_REASONS:
+            try:
+                screenshot = page.screenshot(timeout=10000)
+            except Exception as e:
+                logger.warning(f"Could not take screenshot for artifact '{reason}': {e}")
+        self._seq += 1
+        artifact_id = f"{self._seq:04d}_{_safe(reason)}" + (f"_{_safe(label)}" if label else '')
+        item = {'id': artifact_id, 'reason': reason, 'label': label, 'url': getattr(page, 'url', None),
+                'time': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'), 'sha1': digest,
+                'html': html, 'screenshot': screenshot}
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # The writer is behind; dropping keeps the crawl loop from blocking on disk
+            self.stats['dropped'] += 1
+            return None
+        self.stats['captured'] += 1
+        logger.info(f"Recorded artifact {artifact_id} in {self.run_dir}")
+        return artifact_id
+
+    def close(self):
+        """Flush pending artifacts and stop the writer thread."""
+        self._queue.put(None)
+        self._writer.join()
+        logger.info(f"Artifacts for run {self.run_id}: {dict(self.stats)}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self._write(item)
+            except Exception as e:
+                logger.warning(f"Failed to write artifact {item['id']}: {e}")
+                self.stats['errors'] += 1
+
+    def _make_run_dir(self):
+        """Create this run's directory, suffixed if another run already claimed the name."""
+        suffix = 1
+        while True:
+            try:
+                os.makedirs(self.run_dir)
+                break
+            except FileExistsError:
+                suffix += 1
+                self.run_dir = os.path.join(self.root, f"{self.run_id}_{suffix}")
+        self._run_dir_created = True
+
+    def _write(self, item):
+        if not self._run_dir_created:
+            self._make_run_dir()
+        files = []
+        html_path = os.path.join(self.run_dir, f"{item['id']}.html.gz")
+        with gzip.open(html_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(item['html'])
+        files.append(os.path.basename(html_path))
+        if item['screenshot']:
+            png_path = os.path.join(self.run_dir, f"{item['id']}.png")
+            with open(png_path, 'wb') as f:
+                f.write(item['screenshot'])
+            files.append(os.path.basename(png_path))
+        entry = {k: item[k] for k in ('id', 'reason', 'label', 'url', 'time', 'sha1')}
+        entry['files'] = files
+        with open(os.path.join(self.run_dir, 'manifest.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+        self._prune()
+
+    def _prune(self):
+        """Delete runs older than max_age_days, then oldest files until under max_total_bytes."""
+        cutoff = time.time() - self.max_age_days * 86400
+        files = []
+        # Other workers' recorders may prune the same directory concurrently, so any
+        # run or file can disappear between listing and stat
+        try:
+            runs = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+        for run in runs:
+            run_path = os.path.join(self.root, run)
+            try:
+                if not os.path.isdir(run_path):
+                    continue
+                if run_path != self.run_dir and os.path.getmtime(run_path) < cutoff:
+                    shutil.rmtree(run_path, ignore_errors=True)
+                    self.stats['pruned_runs'] += 1
+                    continue
+                names = os.listdir(run_path)
+            except OSError:
+                continue
+            for name in names:
+                if name == 'manifest.jsonl':
+                    continue
+                path = os.path.join(run_path, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_total_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            self.stats['pruned_files'] += 1
+
+
+def _safe(value):
+    return re.sub(r'[^\w.-]+', '_', str(value)).strip('_')
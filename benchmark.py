@@ -0,0 +1,256 @@
+"""Offline benchmark for the scrapers and the /upload analysis.
+
+Runs `core.scrape_amazon_reviews`, `influenster.scrape_reviews` and the Flask
+`/upload` endpoint against the local mock site (mock_site.py) and writes a JSON
+report with pages/s, reviews/s, p50/p95 page latency and peak RSS per scenario.
+
+    python benchmark.py --output bench_results.json
+    python benchmark.py --output after.json --compare bench_results.json
+
+Each scenario runs in its own subprocess (and scratch directory) so peak RSS is
+per scenario and the scrapers' CSV/log/store output doesn't touch the repo.
+For the upload scenario a "page" is one /upload request.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS falls back to psutil, see peak_rss_mb
+    resource = None
+
+from mock_site import MockReviewSite, load_corpus
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS = ['amazon', 'influenster', 'upload']
+
+# Server request kinds that count as a "page" for each scenario
+PAGE_KINDS = {
+    'amazon': {'amazon_page'},
+    'influenster': {'influenster_page', 'influenster_more'},
+}
+
+# Metrics where a lower value is better, for the comparison report
+LOWER_IS_BETTER = {'elapsed_s', 'page_latency_p50_ms', 'page_latency_p95_ms',
+                   'server_latency_p50_ms', 'server_latency_p95_ms', 'peak_rss_mb', 'peak_children_rss_mb'}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_rss_mb(children=False):
+    """Peak resident memory of this process (or its finished children), in MB; None if unavailable."""
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+        return round(maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    if children:
+        return None  # No peak for exited children without rusage
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    # peak_wset is the peak working set on Windows
+    return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+
+
+def run_worker(scenario, url, upload_reviews, upload_repeats, headless):
+    """Body of the per-scenario subprocess; prints one JSON line with its results."""
+    sys.path.insert(0, REPO_DIR)
+    result = {'scenario': scenario}
+    started = time.time()
+    try:
+        if scenario in ('amazon', 'influenster'):
+            # Run the engine directly: the scrape_* wrappers return [] for a failed crawl too
+            from engine import CrawlEngine
+            if scenario == 'amazon':
+                import core
+                engine = CrawlEngine(core.AmazonAdapter(), headless=headless)
+            else:
+                import influenster
+                engine = CrawlEngine(influenster.InfluensterAdapter(), headless=headless)
+            result['reviews'] = len(engine.run(url))
+            if engine.failure:
+                raise RuntimeError(f"crawl failed: {engine.failure}")
+        elif scenario == 'upload':
+            from app import app
+            corpus = load_corpus()
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, fieldnames=['username', 'rating', 'date', 'review_text'])
+            writer.writeheader()
+            for i in range(upload_reviews):
+                text, rating = corpus[i % len(corpus)]
+                writer.writerow({'username': f"U{i}", 'rating': rating, 'date': '2025-04-27', 'review_text': text})
+            payload = buf.getvalue().encode('utf-8')
+            client = app.test_client()
+            latencies = []
+            for _ in range(upload_repeats):
+                t0 = time.time()
+                response = client.post('/upload', data={'file': (io.BytesIO(payload), 'bench.csv')},
+                                       content_type='multipart/form-data')
+                latencies.append(time.time() - t0)
+                if response.status_code != 200:
+                    raise RuntimeError(f"/upload returned {response.status_code}: {response.get_json()}")
+            result['reviews'] = upload_reviews * upload_repeats
+            result['request_latencies'] = latencies
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['elapsed_s'] = time.time() - started
+    result['peak_rss_mb'] = peak_rss_mb()
+    result['peak_children_rss_mb'] = peak_rss_mb(children=True)
+    print(json.dumps(result))
+
+
+def run_scenario(site, scenario, args):
+    """Run one scenario in a subprocess and derive its metrics from the mock server log."""
+    site.reset_stats()
+    url = {'amazon': site.amazon_url, 'influenster': site.influenster_url}.get(scenario, '')
+    with tempfile.TemporaryDirectory(prefix=f"bench_{scenario}_") as workdir:
+        env = dict(os.environ, REVIEW_STORE_PATH=os.path.join(workdir, 'reviews.db'))
+        cmd = [sys.executable, os.path.join(REPO_DIR, 'benchmark.py'), '--worker', scenario, '--url', url,
+               '--upload-reviews', str(args.upload_reviews), '--upload-repeats', str(args.upload_repeats)]
+        if args.headed:
+            cmd.append('--headed')
+        proc = subprocess.run(cmd, cwd=workdir, env=env, capture_output=True, text=True, timeout=args.timeout)
+    lines = [line for line in proc.stdout.splitlines() if line.startswith('{')]
+    if not lines:
+        return {'status': 'error', 'error': (proc.stderr or proc.stdout).strip()[-2000:]}
+    worker = json.loads(lines[-1])
+
+    if scenario == 'upload':
+        latencies = worker.pop('request_latencies', [])
+        pages = len(latencies)
+        cycle = latencies
+        server = []
+    else:
+        requests = sorted(site.page_requests(PAGE_KINDS[scenario]), key=lambda r: r['started'])
+        pages = len(requests)
+        # Time from one page request to the next is the per-page cost seen by the crawl loop
+        cycle = [b['started'] - a['started'] for a, b in zip(requests, requests[1:])]
+        server = [r['duration'] for r in requests]
+
+    elapsed = worker['elapsed_s']
+    reviews = worker.get('reviews', 0)
+    metrics = {
+        'status': worker['status'],
+        'reviews': reviews,
+        'pages': pages,
+        'elapsed_s': round(elapsed, 3),
+        'pages_per_s': round(pages / elapsed, 4) if elapsed else None,
+        'reviews_per_s': round(reviews / elapsed, 4) if elapsed else None,
+        'page_latency_p50_ms': _ms(percentile(cycle, 50)),
+        'page_latency_p95_ms': _ms(percentile(cycle, 95)),
+        'server_latency_p50_ms': _ms(percentile(server, 50)),
+        'server_latency_p95_ms': _ms(percentile(server, 95)),
+        'peak_rss_mb': worker['peak_rss_mb'],
+        'peak_children_rss_mb': worker['peak_children_rss_mb'],
+    }
+    if 'error' in worker:
+        metrics['error'] = worker['error']
+    return metrics
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline):
+    """Per-metric relative change (%) against a previous report; positive means better."""
+    comparison = {}
+    for scenario, metrics in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(scenario)
+        if not before:
+            continue
+        changes = {}
+        for key, value in metrics.items():
+            old = before.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old * 100
+            changes[key] = round(-change if key in LOWER_IS_BETTER else change, 1)
+        comparison[scenario] = changes
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against a local mock review site")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="Comma-separated subset of %s" % SCENARIOS)
+    parser.add_argument('--amazon-reviews', type=int, default=40)
+    parser.add_argument('--influenster-reviews', type=int, default=40)
+    parser.add_argument('--upload-reviews', type=int, default=2000)
+    parser.add_argument('--upload-repeats', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.2, help="Mock server latency per request (seconds)")
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--timeout', type=int, default=3600, help="Per-scenario timeout (seconds)")
+    parser.add_argument('--headed', action='store_true', help="Show the browser instead of running headless")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="Previous report to compare against")
+    parser.add_argument('--worker', choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument('--url', default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.url, args.upload_reviews, args.upload_repeats, not args.headed)
+        return
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {sorted(unknown)}")
+
+    report = {
+        'run': {
+            'timestamp': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {k: v for k, v in vars(args).items() if k not in ('worker', 'url', 'compare', 'output')},
+        },
+        'scenarios': {},
+    }
+    with MockReviewSite(args.amazon_reviews, args.influenster_reviews, args.latency, args.jitter) as site:
+        for scenario in scenarios:
+            print(f"Running {scenario}...")
+            metrics = run_scenario(site, scenario, args)
+            report['scenarios'][scenario] = metrics
+            print(json.dumps(metrics, indent=2))
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            report['comparison'] = compare(report, json.load(f))
+        for scenario, changes in report['comparison'].items():
+            print(f"{scenario} vs {args.compare}: " + ', '.join(f"{k} {v:+.1f}%" for k, v in changes.items()))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""Lease-based work queue for splitting product crawls across worker nodes.
+
+A coordinator plans each product crawl into work units (Amazon: star filter +
+page range, Influenster: a single unit by default, see plan_influenster) and enqueues them. Any
+number of workers claim units under a time-limited lease, renew it with
+heartbeats while the existing scraper runs, and report results, which are
+stored deduplicated per product. Expired leases are reclaimed; failed units are
+retried with backoff up to `max_attempts`.
+
+    python crawl_queue.py plan amazon "<product reviews url>"
+    python crawl_queue.py plan influenster "<reviews url>" --batches 60
+    python crawl_queue.py worker            # on every node
+    python crawl_queue.py status
+    python crawl_queue.py merge <product> --output dove.csv
+
+The default backend is a SQLite file (`--queue`), which works for workers on one
+host or on a shared filesystem with reliable locking. Other backends register
+in BACKENDS and implement the same methods as SQLiteWorkQueue.
+"""
+import csv
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from review_store import amazon_product_key, influenster_product_key, normalize_review
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = os.environ.get('CRAWL_QUEUE_PATH', 'crawl_queue.db')
+
+AMAZON_FILTERS = ['All', '5-star', '4-star', '3-star', '2-star', '1-star']
+AMAZON_FIELDS = ['id', 'title', 'rating', 'date', 'text', 'verified', 'helpful']
+INFLUENSTER_FIELDS = ['username', 'rating', 'date', 'review_text', 'pros', 'cons']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_units (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product TEXT NOT NULL,
+    site TEXT NOT NULL,
+    url TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL DEFAULT 0,
+    review_count INTEGER,
+    last_error TEXT,
+    updated_at REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_units_identity ON work_units (site, url, params);
+CREATE INDEX IF NOT EXISTS idx_units_claim ON work_units (status, available_at);
+
+CREATE TABLE IF NOT EXISTS results (
+    product TEXT NOT NULL,
+    review_id TEXT NOT NULL,
+    site TEXT NOT NULL,
+    unit_id INTEGER NOT NULL,
+    review TEXT NOT NULL,
+    PRIMARY KEY (product, review_id)
+) WITHOUT ROWID;
+"""
+
+
+def plan_amazon(product_url, max_pages=10, pages_per_unit=5, filters=AMAZON_FILTERS):
+    """Work units for an Amazon product: one per (star filter, page range).
+
+    Amazon lists at most 10 pages per filter, hence the default `max_pages`.
+    """
+    units = []
+    for filter_name in filters:
+        for start in range(1, max_pages + 1, pages_per_unit):
+            units.append({'filters': [filter_name], 'start_page': start,
+                          'end_page': min(start + pages_per_unit - 1, max_pages)})
+    return amazon_product_key(product_url), units
+
+
+def plan_influenster(target_url, batches=50, batches_per_unit=None):
+    """Work units for an Influenster product: one per range of 'Load More' batches.
+
+    Batches are not addressable, so a unit starting at batch k first clicks 'Load More'
+    k times: splitting into n units costs about n / 2 times the clicks of a single crawl
+    and does not scale linearly with workers. Hence the default is a single unit
+    (`batches_per_unit=None`); split only to spread very long crawls or limit retries.
+    """
+    batches_per_unit = batches_per_unit or batches
+    units = [{'skip_batches': start, 'max_batches': min(batches_per_unit, batches - start)}
+             for start in range(0, batches, batches_per_unit)]
+    return influenster_product_key(target_url), units
+
+
+class SQLiteWorkQueue:
+    """Work queue and result sink in a single SQLite file.
+
+    Every call opens its own short-lived connection, so one instance can be shared
+    by a worker's scraping thread and its heartbeat thread, and any number of
+    processes can use the same file.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, retry_backoff=30.0):
+        self.path = path
+        self.retry_backoff = retry_backoff
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return _Transaction(conn)
+
+    def enqueue(self, product, site, url, units, max_attempts=3):
+        """Add work units; units already in the queue are left as they are. Returns how many were added."""
+        now = time.time()
+        with self._connect() as conn:
+            added = 0
+            for params in units:
+                cursor = conn.execute(
+                    """INSERT OR IGNORE INTO work_units (product, site, url, params, max_attempts, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (product, site, url, json.dumps(params, sort_keys=True), max_attempts, now))
+                added += cursor.rowcount
+        logger.info(f"Queued {added} work units for {site}/{product}")
+        return added
+
+    def claim(self, worker_id, lease_seconds=300):
+        """Lease the next available unit (pending, or whose lease expired) to a worker, or return None."""
+        now = time.time()
+        with self._connect() as conn:
+            # Expired leases go back to pending, or to failed once out of attempts
+            conn.execute(
+                """UPDATE work_units SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                          last_error = COALESCE(last_error, 'lease expired'), worker = NULL, updated_at = ?
+                   WHERE status = 'leased' AND lease_expires < ?""", (now, now))
+            row = conn.execute(
+                """SELECT * FROM work_units WHERE status = 'pending' AND available_at <= ?
+                   ORDER BY id LIMIT 1""", (now,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                """UPDATE work_units SET status = 'leased', worker = ?, lease_expires = ?,
+                          attempts = attempts + 1, updated_at = ? WHERE id = ?""",
+                (worker_id, now + lease_seconds, now, row['id']))
+        unit = dict(row)
+        unit['params'] = json.loads(unit['params'])
+        unit['attempts'] += 1
+        return unit
+
+    def heartbeat(self, unit_id, worker_id, lease_seconds=300):
+        """Extend a lease; returns False if the worker no longer holds it."""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """UPDATE work_units SET lease_expires = ?, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (now + lease_seconds, now, unit_id, worker_id))
+        return cursor.rowcount == 1
+
+    def complete(self, unit, worker_id, reviews):
+        """Store a unit's reviews (deduplicated per product) and mark it done."""
+        rows = []
+        for review in reviews:
+            review_id = normalize_review(review, unit['product'], unit['site'])['id']
+            rows.append((unit['product'], review_id, unit['site'], unit['id'], json.dumps(review)))
+        with self._connect() as conn:
+            # Results are idempotent, so a late worker whose lease was reclaimed still contributes safely
+            conn.executemany(
+                'INSERT OR IGNORE INTO results (product, review_id, site, unit_id, review) VALUES (?, ?, ?, ?, ?)', rows)
+            conn.execute(
+                """UPDATE work_units SET status = 'done', worker = ?, review_count = ?, lease_expires = NULL,
+                          updated_at = ?
+                   WHERE id = ? AND (worker = ? OR status != 'done')""",
+                (worker_id, len(reviews), time.time(), unit['id'], worker_id))
+
+    def fail(self, unit, worker_id, error):
+        """Release a unit after an error; it is retried after a backoff until max_attempts.
+
+        Only the worker currently holding the lease can fail a unit, so a unit completed
+        by a late worker is not sent back to pending by the worker that reclaimed it.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """UPDATE work_units SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                          available_at = ? + ? * attempts, last_error = ?, worker = NULL,
+                          lease_expires = NULL, updated_at = ?
+                   WHERE id = ? AND worker = ? AND status = 'leased'""",
+                (now, self.retry_backoff, str(error)[:1000], now, unit['id'], worker_id))
+
+    def stats(self):
+        """Unit counts by status, per product, plus merged review counts."""
+        with self._connect() as conn:
+            units = conn.execute(
+                'SELECT product, status, COUNT(*) AS n FROM work_units GROUP BY product, status').fetchall()
+            results = conn.execute('SELECT product, COUNT(*) AS n FROM results GROUP BY product').fetchall()
+        summary = {}
+        for row in units:
+            summary.setdefault(row['product'], {'units': {}, 'reviews': 0})['units'][row['status']] = row['n']
+        for row in results:
+            summary.setdefault(row['product'], {'units': {}, 'reviews': 0})['reviews'] = row['n']
+        return summary
+
+    def results(self, product):
+        """Deduplicated reviews collected for a product, in unit order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT site, review FROM results WHERE product = ? ORDER BY unit_id', (product,)).fetchall()
+        return [(row['site'], json.loads(row['review'])) for row in rows]
+
+
+class _Transaction:
+    """Context manager running one IMMEDIATE transaction on a connection, then closing it."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.conn.close()
+
+
+BACKENDS = {'sqlite': SQLiteWorkQueue}
+
+
+def open_queue(spec=DEFAULT_QUEUE_PATH):
+    """Open a queue from 'backend:location', or a bare path for the SQLite backend."""
+    backend, sep, location = spec.partition(':')
+    if sep and backend in BACKENDS:
+        return BACKENDS[backend](location)
+    return SQLiteWorkQueue(spec)
+
+
+def site_adapter(site):
+    """The crawl engine adapter for a site name."""
+    if site == 'amazon':
+        import core
+        return core.AmazonAdapter()
+    if site == 'influenster':
+        import influenster
+        return influenster.InfluensterAdapter()
+    raise ValueError(f"Unknown site: {site}")
+
+
+def run_unit(unit, headless=True):
+    """Crawl one work unit and return its reviews.
+
+    Raises CrawlError when the crawl could not complete (setup, CAPTCHA or a critical
+    error), so the worker retries the unit instead of completing it with partial results.
+    """
+    from engine import CrawlEngine, CrawlError
+    engine = CrawlEngine(site_adapter(unit['site']), headless=headless)
+    reviews = engine.run(unit['url'], **unit['params'])
+    if engine.failure:
+        raise CrawlError(f"{unit['site']} crawl failed: {engine.failure}", reviews)
+    return reviews
+
+
+def run_worker(queue, worker_id=None, lease_seconds=300, wait=False, poll_interval=10, headless=True):
+    """Claim and process units until the queue is drained (or forever with `wait`)."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    processed = 0
+    while True:
+        unit = queue.claim(worker_id, lease_seconds)
+        if unit is None:
+            if not wait:
+                logger.info(f"Worker {worker_id}: no work left, processed {processed} units")
+                return processed
+            time.sleep(poll_interval)
+            continue
+        logger.info(f"Worker {worker_id}: claimed unit {unit['id']} ({unit['site']}/{unit['product']} {unit['params']})")
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def beat(unit_id=unit['id']):
+            while not stop.wait(lease_seconds / 3):
+                if not queue.heartbeat(unit_id, worker_id, lease_seconds):
+                    logger.warning(f"Worker {worker_id}: lost lease on unit {unit_id}")
+                    lost.set()
+                    return
+
+        heartbeat = threading.Thread(target=beat, daemon=True)
+        heartbeat.start()
+        try:
+            reviews = run_unit(unit, headless=headless)
+            queue.complete(unit, worker_id, reviews)
+            logger.info(f"Worker {worker_id}: unit {unit['id']} done with {len(reviews)} reviews"
+                        + (" (lease had expired)" if lost.is_set() else ""))
+        except Exception as e:
+            logger.error(f"Worker {worker_id}: unit {unit['id']} failed: {e}")
+            queue.fail(unit, worker_id, e)
+        finally:
+            stop.set()
+            heartbeat.join()
+        processed += 1
+
+
+def merge(queue, product, output):
+    """Write a product's deduplicated reviews to a CSV in the site's usual columns."""
+    rows = queue.results(product)
+    if not rows:
+        logger.warning(f"No results for {product}")
+        return 0
+    site = rows[0][0]
+    fieldnames = AMAZON_FIELDS if site == 'amazon' else INFLUENSTER_FIELDS
+    with open(output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(review for _, review in rows)
+    logger.info(f"Merged {len(rows)} reviews for {product} into {output}")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Coordinate product crawls across worker nodes")
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH, help="Queue location (path or backend:location)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help="Split a product crawl into work units")
+    plan.add_argument('site', choices=['amazon', 'influenster'])
+    plan.add_argument('url')
+    plan.add_argument('--max-pages', type=int, default=10, help="Amazon pages per star filter")
+    plan.add_argument('--pages-per-unit', type=int, default=5)
+    plan.add_argument('--batches', type=int, default=50, help="Influenster 'Load More' batches")
+    plan.add_argument('--batches-per-unit', type=int, default=None,
+                      help="Split Influenster crawls into units (each re-clicks the batches before it)")
+    plan.add_argument('--max-attempts', type=int, default=3)
+
+    worker = commands.add_parser('worker', help="Process work units until the queue is empty")
+    worker.add_argument('--worker-id')
+    worker.add_argument('--lease', type=int, default=300, help="Lease length in seconds")
+    worker.add_argument('--wait', action='store_true', help="Keep polling for new work")
+    worker.add_argument('--headed', action='store_true', help="Show the browser")
+
+    commands.add_parser('status', help="Show unit and result counts per product")
+
+    merge_cmd = commands.add_parser('merge', help="Write a product's deduplicated reviews to CSV")
+    merge_cmd.add_argument('product')
+    merge_cmd.add_argument('--output')
+
+    args = parser.parse_args()
+    queue = open_queue(args.queue)
+    if args.command == 'plan':
+        if args.site == 'amazon':
+            product, units = plan_amazon(args.url, args.max_pages, args.pages_per_unit)
+        else:
+            product, units = plan_influenster(args.url, args.batches, args.batches_per_unit)
+        queue.enqueue(product, args.site, args.url, units, args.max_attempts)
+    elif args.command == 'worker':
+        run_worker(queue, args.worker_id, args.lease, args.wait, headless=not args.headed)
+    elif args.command == 'status':
+        print(json.dumps(queue.stats(), indent=2))
+    elif args.command == 'merge':
+        merge(queue, args.product, args.output or f"{args.product}_reviews_merged.csv")
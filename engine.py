@@ -0,0 +1,351 @@
+"""Crawl engine shared by the review scrapers.
+
+The engine owns everything that is the same for every review site: browser
+setup, CAPTCHA/challenge waits, pacing and scrolling, exact and near-duplicate
+dedup, incremental CSV + review-store output, failure artifacts, the selector
+cache, run stats and (optionally) running a product's targets in parallel
+browser processes. A site is a small SiteAdapter subclass that plans the
+targets to crawl, navigates and paginates them, and extracts review fields.
+
+    engine = CrawlEngine(AmazonAdapter(), headless=True)
+    reviews = engine.run(product_url, concurrency=3)
+"""
+import csv
+import logging
+from abc import ABC, abstractmethod
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from playwright.sync_api import sync_playwright
+
+from artifacts import ArtifactRecorder
+from near_dup import DEFAULT_THRESHOLD, MinHashLSH
+from review_store import DEFAULT_DB_PATH, ReviewStore, is_recapture, normalize_review
+from selector_cache import SelectorCache, site_key
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlError(Exception):
+    """A crawl that could not run to completion; `reviews` holds any rows collected before it failed."""
+
+    def __init__(self, message, reviews=None):
+        super().__init__(message)
+        self.reviews = reviews or []
+
+
+class SiteAdapter(ABC):
+    """Site-specific part of a crawl. Subclasses implement the abstract hooks and override the others as needed.
+
+    A target is a dict describing one listing to walk (e.g. one star filter), with
+    at least 'name', 'page' (current page/batch index) and 'end' (last index to
+    crawl, or None). Adapters may keep their own state in it; setting
+    target['done'] stops the target after the current page.
+    """
+
+    site = None
+    fields = []  # CSV columns of the rows returned by extract()
+    output_dir = '.'
+    scroll_rounds = 1
+    scroll_settle = (1, 2)
+    challenge_timeout = 120
+
+    @abstractmethod
+    def product_key(self, url):
+        """Store key for the product at this URL (e.g. the ASIN)."""
+
+    def output_filename(self, product):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return f"{self.site}_{product}_{timestamp}_{os.getpid()}.csv"
+
+    def launch_options(self, headless):
+        return {'headless': headless}
+
+    def context_options(self):
+        return {}
+
+    def plan(self, url, **options):
+        """Targets to crawl for a product URL."""
+        return [{'name': 'All', 'page': 1, 'end': None}]
+
+    def start(self, page, engine, url):
+        """Initial navigation and one-off setup (login, cookies, sorting). Return False to abort."""
+        page.goto(url, timeout=60000, wait_until="domcontentloaded")
+        return True
+
+    def is_challenge(self, page):
+        """True while a CAPTCHA or bot challenge is showing."""
+        return False
+
+    def open_target(self, page, engine, target):
+        """Make target['page'] of the target current. Return False to stop the target."""
+        return True
+
+    @abstractmethod
+    def find_reviews(self, page, engine, target):
+        """Review elements on the current page that have not been processed yet."""
+
+    @abstractmethod
+    def extract(self, page, engine, element, target):
+        """Extract one review row (a dict with `fields`), or None to skip it."""
+
+    def next_page(self, page, engine, target):
+        """Advance to the next page/batch of the target. Return False when there is none."""
+        return False
+
+    @abstractmethod
+    def review_id(self, row):
+        """Stable id of an extracted row, for exact dedup."""
+
+    def review_text(self, row):
+        return row.get('text', '')
+
+    def summarize(self, rows):
+        """Site-specific stats logged at the end of a run."""
+
+
+class CrawlEngine:
+    """Runs a SiteAdapter: fetching, pacing, concurrency, dedup and output."""
+
+    def __init__(self, adapter, headless=False, pace=1.0, store_path=None, write_output=True,
+                 dedup_threshold=DEFAULT_THRESHOLD):
+        self.adapter = adapter
+        self.headless = headless
+        self.pace = pace
+        self.store_path = store_path
+        self.write_output = write_output
+        self.dedup_threshold = dedup_threshold
+        self.reviews = []
+        self.seen_ids = set()
+        self.near_dups = MinHashLSH(dedup_threshold)
+        self._identities = {}  # review id -> normalized row, to tell re-captures from copies
+        self.stats = {'pages': 0, 'duplicates': 0, 'near_duplicates': 0, 'errors': 0}
+        self.failure = None  # Why the crawl could not complete, if it failed
+        self.artifacts = None
+        self.selectors = None
+        self.csv_file = None
+        self._store = None
+        self._product = None
+
+    # Helpers for adapters
+
+    def fail(self, reason):
+        """Mark the crawl as failed (e.g. setup or a challenge could not be completed); the first reason wins."""
+        if self.failure is None:
+            self.failure = reason
+
+    def pause(self, low, high=None):
+        """Sleep a random interval, scaled by the engine's pace."""
+        time.sleep(random.uniform(low, high if high is not None else low) * self.pace)
+
+    def scroll(self, page, rounds=1, settle=(1, 2)):
+        for _ in range(rounds):
+            page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
+            self.pause(*settle)
+
+    def wait_for_challenge(self, page, url):
+        """If a challenge is showing, wait for it to be solved in the browser, then reload the URL."""
+        if not self.adapter.is_challenge(page):
+            return True
+        logger.info("CAPTCHA detected, please solve manually in the browser")
+        deadline = time.time() + self.adapter.challenge_timeout
+        while time.time() < deadline:
+            time.sleep(2)
+            if not self.adapter.is_challenge(page):
+                logger.info("Success: CAPTCHA solved, resuming scraping")
+                page.goto(url, timeout=60000, wait_until="domcontentloaded")
+                return True
+        logger.error("CAPTCHA was not solved in time")
+        self.artifacts.capture(page, 'captcha_timeout')
+        self.fail('captcha_timeout')
+        return False
+
+    # Running
+
+    def run(self, url, concurrency=1, **plan_options):
+        """Crawl a product and return its deduplicated review rows.
+
+        The rows collected so far are returned even if the crawl failed; check `failure`.
+        """
+        targets = self.adapter.plan(url, **plan_options)
+        parallel = concurrency > 1 and len(targets) > 1
+        # In parallel mode the browser-side state (artifacts, selector cache) lives in the crawl processes
+        self._open_outputs(url, browser=not parallel)
+        try:
+            if parallel:
+                self._run_parallel(url, targets, concurrency)
+            else:
+                self.crawl_targets(url, targets)
+        finally:
+            self._close_outputs()
+        return self.reviews
+
+    def _run_parallel(self, url, targets, concurrency):
+        """Split the targets across browser processes; rows are deduplicated and written here."""
+        partitions = [targets[i::concurrency] for i in range(concurrency)]
+        partitions = [p for p in partitions if p]
+        logger.info(f"Crawling {len(targets)} targets in {len(partitions)} processes")
+        with ProcessPoolExecutor(max_workers=len(partitions)) as pool:
+            futures = [pool.submit(_crawl_partition, self.adapter, url, part, self.headless, self.pace,
+                                   self.dedup_threshold)
+                       for part in partitions]
+            for future in futures:
+                try:
+                    rows, stats, failure = future.result()
+                except Exception as e:
+                    logger.error(f"Crawl process failed: {e}")
+                    self.stats['errors'] += 1
+                    self.fail(f"crawl process failed: {e}")
+                    continue
+                if failure:
+                    self.fail(failure)
+                for key, value in stats.items():
+                    self.stats[key] += value
+                self._save(self._dedup(rows))
+
+    def crawl_targets(self, url, targets):
+        """Crawl the given targets in one browser, saving rows as each page completes."""
+        with sync_playwright() as p:
+            browser = p.chromium.launch(**self.adapter.launch_options(self.headless))
+            context = browser.new_context(**self.adapter.context_options())
+            page = context.new_page()
+            try:
+                if not self.adapter.start(page, self, url) or not self.wait_for_challenge(page, url):
+                    self.fail('setup_failed')
+                    return self.reviews
+                for target in targets:
+                    self._crawl_target(page, target)
+            except Exception as e:
+                logger.error(f"Critical error: {e}")
+                self.stats['errors'] += 1
+                self.fail(f"critical_error: {e}")
+                self.artifacts.capture(page, 'critical_error')
+            finally:
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+        return self.reviews
+
+    def _crawl_target(self, page, target):
+        name = target['name']
+        while True:
+            if target.get('end') is not None and target['page'] > target['end']:
+                logger.info(f"Reached end of page range ({target['end']}) for {name}")
+                break
+            if not self.adapter.open_target(page, self, target):
+                break
+            logger.info(f"Processing page {target['page']} for {name}")
+            self.scroll(page, self.adapter.scroll_rounds, self.adapter.scroll_settle)
+            elements = self.adapter.find_reviews(page, self, target)
+            self.stats['pages'] += 1
+            if not elements:
+                logger.info(f"No reviews found for {name} on page {target['page']}")
+                self.artifacts.capture(page, 'no_reviews', f"page_{target['page']}_{name}")
+                break
+            rows = []
+            for idx, element in enumerate(elements):
+                try:
+                    row = self.adapter.extract(page, self, element, target)
+                    if row is not None:
+                        rows.append(row)
+                except Exception as e:
+                    logger.warning(f"Error extracting review {idx}: {e}")
+                    self.stats['errors'] += 1
+                if target.get('done'):
+                    break
+            self._save(self._dedup(rows))
+            if target.get('done'):
+                break
+            try:
+                if not self.adapter.next_page(page, self, target):
+                    logger.info(f"No more pages available for {name}")
+                    break
+            except Exception as e:
+                logger.error(f"Pagination error: {e}")
+                self.stats['errors'] += 1
+                self.artifacts.capture(page, 'pagination_error', f"page_{target['page']}_{name}")
+                break
+            target['page'] += 1
+
+    # Dedup and output
+
+    def _dedup(self, rows):
+        new_rows = []
+        for row in rows:
+            review_id = self.adapter.review_id(row)
+            if review_id in self.seen_ids:
+                self.stats['duplicates'] += 1
+                continue
+            self.seen_ids.add(review_id)
+            identity = normalize_review(row, self._product, self.adapter.site)
+            self._identities[review_id] = identity
+            matches = self.near_dups.add(review_id, self.adapter.review_text(row))
+            if any(is_recapture(identity, self._identities[key]) for key, _ in matches):
+                logger.info(f"Skipped near-duplicate review {review_id}")
+                self.stats['near_duplicates'] += 1
+                continue
+            new_rows.append(row)
+        return new_rows
+
+    def _open_outputs(self, url, browser=True):
+        self._product = self.adapter.product_key(url)
+        if browser:
+            self.artifacts = ArtifactRecorder(f"{self.adapter.site}_{self._product}")
+            self.selectors = SelectorCache(site_key(url))
+        if not self.write_output:
+            return
+        self._store = ReviewStore(self.store_path or DEFAULT_DB_PATH, dedup_threshold=self.dedup_threshold)
+        os.makedirs(self.adapter.output_dir, exist_ok=True)
+        self.csv_file = os.path.join(self.adapter.output_dir, self.adapter.output_filename(self._product))
+        with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
+            csv.DictWriter(f, fieldnames=self.adapter.fields).writeheader()
+
+    def _save(self, rows):
+        if not rows:
+            return
+        self.reviews.extend(rows)
+        logger.info(f"Added {len(rows)} reviews (Total: {len(self.reviews)})")
+        if not self.write_output:
+            return
+        try:
+            with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
+                csv.DictWriter(f, fieldnames=self.adapter.fields, extrasaction='ignore').writerows(rows)
+        except Exception as e:
+            logger.error(f"Failed to save CSV incrementally: {e}")
+        try:
+            self._store.add_reviews(rows, self._product, self.adapter.site, source=self.csv_file)
+        except Exception as e:
+            logger.warning(f"Failed to write reviews to store: {e}")
+
+    def _close_outputs(self):
+        if self.reviews:
+            if self.csv_file:
+                logger.info(f"Success: Saved {len(self.reviews)} reviews to {self.csv_file}")
+            self.adapter.summarize(self.reviews)
+        else:
+            logger.warning("No reviews were extracted")
+        logger.info(f"Crawl stats: {self.stats}")
+        logger.info(f"Near-duplicate clusters: {self.near_dups.clusters()}")
+        if self.selectors:
+            logger.info(f"Selector probe stats: {self.selectors.run_stats()}")
+            self.selectors.save()
+        if self.artifacts:
+            self.artifacts.close()
+        if self._store:
+            self._store.close()
+
+
+def _crawl_partition(adapter, url, targets, headless, pace, dedup_threshold):
+    """Process-pool entry point: crawl some targets without writing output."""
+    engine = CrawlEngine(adapter, headless=headless, pace=pace, write_output=False,
+                         dedup_threshold=dedup_threshold)
+    engine._open_outputs(url)
+    try:
+        engine.crawl_targets(url, targets)
+    finally:
+        engine._close_outputs()
+    return engine.reviews, engine.stats, engine.failure
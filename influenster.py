@@ -1,11 +1,12 @@
 import logging
-import csv
-import time
-import random
 import os
 import re
 from datetime import datetime, timedelta
-from playwright.sync_api import sync_playwright, TimeoutError
+from hashlib import md5
+from playwright.sync_api import TimeoutError
+from engine import CrawlEngine, SiteAdapter
+from near_dup import DEFAULT_THRESHOLD
+from review_store import influenster_product_key
 
 # Configure logging
 logging.basicConfig(
@@ -18,9 +19,9 @@ logging.basicConfig(
 )
 
 def generate_filename():
-    """Generate a timestamped filename for the CSV."""
+    """Generate a timestamped filename for the CSV, unique per process."""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    return f"aveeno_reviews_{timestamp}.csv"
+    return f"aveeno_reviews_{timestamp}_{os.getpid()}.csv"
 
 def parse_relative_date(relative_date, current_date):
     """Convert relative date (e.g., '2 days ago', '2d ago') to actual date."""
@@ -55,204 +56,190 @@ def parse_relative_date(relative_date, current_date):
         logging.warning(f"Failed to parse relative date '{relative_date}': {e}")
         return relative_date
 
-def scrape_reviews():
-    current_date = datetime(2025, 4, 27)  # Current date as per context
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
-        page = context.new_page()
-        all_reviews = []
-        seen_reviews = set()  
-        
+TARGET_URL = "https://www.influenster.com/reviews/dove-body-lotion-for-sensitive-skin/reviews"
+
+CARD_SELECTOR = "div[class*='UgcContainer_ugc-container__']"
+LOAD_MORE_SELECTOR = "button[class*='InfiniteScroll_infinite-scroll__load-more-button__']"
+CHALLENGE_SELECTOR = "iframe[src*='captcha'], div[id*='captcha'], div[class*='recaptcha'], iframe[src*='/cdn-cgi/challenge-platform']"
+
+
+class InfluensterAdapter(SiteAdapter):
+    """Influenster product reviews: one infinite-scroll listing, paginated by 'Load More' batches.
+
+    Batch 0 is the initial page; each 'Load More' click adds one batch.
+    """
+
+    site = 'influenster'
+    fields = ['username', 'rating', 'date', 'review_text', 'pros', 'cons']
+    output_dir = 'scraped_reviews'
+    scroll_settle = (3, 3)
+    challenge_timeout = 30
+
+    def __init__(self, current_date=datetime(2025, 4, 27)):  # Current date as per context
+        self.current_date = current_date
+
+    def product_key(self, url):
+        return influenster_product_key(url)
+
+    def output_filename(self, product):
+        return generate_filename()
+
+    def context_options(self):
+        return {
+            'user_agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        }
+
+    def plan(self, url, skip_batches=0, max_batches=None):
+        end = skip_batches + max_batches - 1 if max_batches else None
+        return [{'name': 'All', 'page': skip_batches, 'end': end, 'skip': skip_batches, 'offset': 0}]
+
+    def is_challenge(self, page):
+        return bool(page.query_selector(CHALLENGE_SELECTOR))
+
+    def start(self, page, engine, url):
+        logging.info(f"Navigating to reviews page: {url}")
+        page.goto(url, timeout=60000)
+        engine.pause(5)
+
+        if "profile" in page.url:
+            logging.error("Landed on a profile page instead of reviews page. Reviews may only be available in the app.")
+            engine.fail('profile_page')
+            return False
+
+        try:
+            page.click("button:has-text('Accept'), button[class*='cookie'], button[id*='accept']", timeout=5000)
+            logging.info("Accepted cookies")
+            engine.pause(1)
+        except Exception:
+            logging.info("No cookie button found")
+        return engine.wait_for_challenge(page, url)
+
+    def open_target(self, page, engine, target):
+        # Later batches are appended to the same page by next_page()
+        if target.get('opened'):
+            return True
+        target['opened'] = True
+        logging.info("Waiting for reviews to load...")
         try:
-            # Navigate to the product reviews page
-            target_url = "https://www.influenster.com/reviews/dove-body-lotion-for-sensitive-skin/reviews"
-            logging.info(f"Navigating to reviews page: {target_url}")
-            page.goto(target_url, timeout=60000)
-            time.sleep(5)  # Delay for page load
-
-            # Check if we're on the correct page
-            if "profile" in page.url:
-                logging.error("Landed on a profile page instead of reviews page. Reviews may only be available in the app.")
-                return all_reviews
-            
-            # Accept cookies
-            try:
-                page.click("button:has-text('Accept'), button[class*='cookie'], button[id*='accept']", timeout=5000)
-                logging.info("Accepted cookies")
-                time.sleep(1)
-            except:
-                logging.info("No cookie button found")
-
-            # Check for CAPTCHA or Cloudflare challenge
-            captcha = page.query_selector("iframe[src*='captcha'], div[id*='captcha'], div[class*='recaptcha'], iframe[src*='/cdn-cgi/challenge-platform']")
-            if captcha:
-                logging.warning("CAPTCHA or Cloudflare challenge detected. Solve it manually in the browser.")
-                time.sleep(30)  # Wait for manual CAPTCHA solving
-
-            # Wait for initial reviews to load
-            logging.info("Waiting for reviews to load...")
-            try:
-                page.wait_for_selector("div[class*='UgcContainer_ugc-container__']", timeout=30000)
-                logging.info("Review elements found")
-            except TimeoutError:
-                logging.warning("No review elements found after waiting")
-                with open('page_content.html', 'w', encoding='utf-8') as f:
-                    f.write(page.content())
-                logging.info("Saved page HTML to 'page_content.html' for debugging")
-                return all_reviews
-
-            while True:
-                # Scroll to ensure all visible reviews are loaded
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(3)
-
-                # Extract current visible reviews
-                review_blocks = page.query_selector_all("div[class*='UgcContainer_ugc-container__']")
-                new_reviews = []
-                
-                for idx, review in enumerate(review_blocks):
-                    try:
-                        # Get unique content hash to avoid duplicates
-                        content = review.inner_text()
-                        content_hash = hash(content[:200])
-                        
-                        if content_hash in seen_reviews:
-                            continue
-                            
-                        seen_reviews.add(content_hash)
-                        
-                        # Scroll into view
-                        review.scroll_into_view_if_needed()
-                        time.sleep(0.2)
-                        
-                        # Extract username
-                        username = "Unknown"
-                        username_elem = review.query_selector("h5[class*='MiniProfileTimestamp_mini-profile-timestamp__profile-name__']")
-                        if username_elem:
-                            username = username_elem.inner_text().strip()
-                        if username == "Unknown":
-                            logging.warning(f"Username not found for review {idx}. Full HTML: {review.inner_html()}")
-
-                        # Extract date
-                        date = "Unknown"
-                        date_elem = review.query_selector("time")
-                        if date_elem:
-                            # Try to get the datetime attribute for exact date
-                            datetime_attr = date_elem.get_attribute("datetime")
-                            if datetime_attr:
-                                try:
-                                    parsed_date = datetime.fromisoformat(datetime_attr.replace('Z', '+00:00'))
-                                    date = parsed_date.strftime('%Y-%m-%d')
-                                    logging.info(f"Extracted exact date for review {idx}: {date}")
-                                except ValueError:
-                                    logging.warning(f"Failed to parse datetime attribute for review {idx}: {datetime_attr}")
-                                    date_text = date_elem.inner_text().strip() or "Unknown"
-                                    date = parse_relative_date(date_text, current_date)
-                            else:
-                                date_text = date_elem.inner_text().strip() or "Unknown"
-                                date = parse_relative_date(date_text, current_date)
-                                logging.info(f"No datetime attribute for review {idx}, calculated date: {date}")
-                        else:
-                            logging.warning(f"No <time> element found for review {idx}. Full HTML: {review.inner_html()}")
-                            date = "Date not found"
-
-                        # Extract review text
-                        text_elem = review.query_selector("div[class*='Review_review__body-text__']")
-                        text = text_elem.inner_text().strip() if text_elem else ""
-
-                        # Extract rating
-                        rating = 0
-                        rating_container = review.query_selector("div[class*='StarRating_star-rating__']")
-                        if rating_container:
-                            rating_elem = rating_container.query_selector("div[class*='StarRating_star-rating__rating-text__']")
-                            if rating_elem:
-                                rating_text = rating_elem.inner_text().strip()
-                                rating_match = re.search(r'(\d+)\s*/\s*5', rating_text)
-                                if rating_match:
-                                    rating = int(rating_match.group(1))
-                        if rating == 0:
-                            logging.warning(f"Rating not found for review {idx}. Full HTML: {review.inner_html()}")
-
-                        new_reviews.append({
-                            'username': username,
-                            'rating': rating,
-                            'date': date,
-                            'review_text': text,
-                            'pros': "",
-                            'cons': ""
-                        })
-                        
-                    except Exception as e:
-                        logging.warning(f"Skipping review {idx} due to error: {e}")
-                        continue
-                
-                if new_reviews:
-                    all_reviews.extend(new_reviews)
-                    logging.info(f"Added {len(new_reviews)} reviews (Total: {len(all_reviews)})")
-                
-                # Try to load more
+            page.wait_for_selector(CARD_SELECTOR, timeout=30000)
+            logging.info("Review elements found")
+        except TimeoutError:
+            logging.warning("No review elements found after waiting")
+            engine.artifacts.capture(page, 'no_reviews')
+            engine.fail('no_reviews')
+            return False
+        # Fast-forward through batches owned by another work unit
+        for _ in range(target['skip']):
+            target['offset'] = len(page.query_selector_all(CARD_SELECTOR))
+            if not self._load_more(page, engine):
+                return False
+        return True
+
+    def find_reviews(self, page, engine, target):
+        cards = page.query_selector_all(CARD_SELECTOR)
+        new_cards = cards[target['offset']:]
+        target['offset'] = len(cards)
+        return new_cards
+
+    def extract(self, page, engine, review, target):
+        review.scroll_into_view_if_needed()
+        engine.pause(0.2)
+
+        username = "Unknown"
+        username_elem = review.query_selector("h5[class*='MiniProfileTimestamp_mini-profile-timestamp__profile-name__']")
+        if username_elem:
+            username = username_elem.inner_text().strip()
+        if username == "Unknown":
+            logging.warning(f"Username not found for review. Full HTML: {review.inner_html()}")
+
+        date = "Unknown"
+        date_elem = review.query_selector("time")
+        if date_elem:
+            # Try to get the datetime attribute for exact date
+            datetime_attr = date_elem.get_attribute("datetime")
+            if datetime_attr:
                 try:
-                    load_more = page.query_selector("button[class*='InfiniteScroll_infinite-scroll__load-more-button__']")
-                    if load_more:
-                        load_more.scroll_into_view_if_needed()
-                        load_more.click()
-                        logging.info("Clicked 'Load More'")
-                        time.sleep(random.uniform(3, 5))
-                        page.wait_for_selector("div[class*='UgcContainer_ugc-container__']", timeout=5000)
-                    else:
-                        logging.info("No more 'Load More' button found")
-                        break
-                except TimeoutError:
-                    logging.info("No more 'Load More' button available or new reviews loaded")
-                    break
-                except Exception as e:
-                    logging.warning(f"Error loading more: {e}")
-                    break
-            
-            return all_reviews
-            
-        except Exception as e:
-            logging.error(f"Error during scraping: {e}")
-            return all_reviews
-            
-        finally:
-            browser.close()
-
-def save_to_csv(reviews):
-    if not reviews:
-        logging.warning("No reviews to save")
-        return
-    
-    # Create directory if it doesn't exist
-    save_dir = r"C:\Users\windows\Downloads\review\scraped_reviews"
-    os.makedirs(save_dir, exist_ok=True)
-    
-    # Generate timestamped filename
-    filename = os.path.join(save_dir, generate_filename())
-    
-    try:
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=['username', 'rating', 'date', 'review_text', 'pros', 'cons'])
-            writer.writeheader()
-            writer.writerows(reviews)
-        logging.info(f"Saved {len(reviews)} reviews to {filename}")
-    except Exception as e:
-        logging.error(f"Failed to save reviews to {filename}: {e}")
-        raise
+                    parsed_date = datetime.fromisoformat(datetime_attr.replace('Z', '+00:00'))
+                    date = parsed_date.strftime('%Y-%m-%d')
+                except ValueError:
+                    logging.warning(f"Failed to parse datetime attribute: {datetime_attr}")
+                    date_text = date_elem.inner_text().strip() or "Unknown"
+                    date = parse_relative_date(date_text, self.current_date)
+            else:
+                date_text = date_elem.inner_text().strip() or "Unknown"
+                date = parse_relative_date(date_text, self.current_date)
+                logging.info(f"No datetime attribute, calculated date: {date}")
+        else:
+            logging.warning(f"No <time> element found for review. Full HTML: {review.inner_html()}")
+            date = "Date not found"
+
+        text_elem = review.query_selector("div[class*='Review_review__body-text__']")
+        text = text_elem.inner_text().strip() if text_elem else ""
+
+        rating = 0
+        rating_container = review.query_selector("div[class*='StarRating_star-rating__']")
+        if rating_container:
+            rating_elem = rating_container.query_selector("div[class*='StarRating_star-rating__rating-text__']")
+            if rating_elem:
+                rating_match = re.search(r'(\d+)\s*/\s*5', rating_elem.inner_text().strip())
+                if rating_match:
+                    rating = int(rating_match.group(1))
+        if rating == 0:
+            logging.warning(f"Rating not found for review. Full HTML: {review.inner_html()}")
+
+        return {
+            'username': username,
+            'rating': rating,
+            'date': date,
+            'review_text': text,
+            'pros': "",
+            'cons': ""
+        }
+
+    def next_page(self, page, engine, target):
+        return self._load_more(page, engine)
+
+    def _load_more(self, page, engine):
+        load_more = page.query_selector(LOAD_MORE_SELECTOR)
+        if not load_more:
+            logging.info("No more 'Load More' button found")
+            return False
+        try:
+            load_more.scroll_into_view_if_needed()
+            load_more.click()
+            logging.info("Clicked 'Load More'")
+            engine.pause(3, 5)
+            page.wait_for_selector(CARD_SELECTOR, timeout=5000)
+        except TimeoutError:
+            logging.info("No more 'Load More' button available or new reviews loaded")
+            return False
+        return True
+
+    def review_id(self, row):
+        return md5(f"{row['username']}|{row['date']}|{row['review_text']}".encode('utf-8')).hexdigest()
+
+    def review_text(self, row):
+        return row['review_text']
+
+
+def scrape_reviews(target_url=TARGET_URL, headless=False, skip_batches=0, max_batches=None,
+                   dedup_threshold=DEFAULT_THRESHOLD):
+    """Scrape reviews, optionally only the 'Load More' batches [skip_batches, skip_batches + max_batches).
+
+    Reviews are written to a timestamped CSV in scraped_reviews/ and to the review store;
+    `dedup_threshold` is the similarity at which reviews count as near-duplicates.
+    """
+    engine = CrawlEngine(InfluensterAdapter(), headless=headless, dedup_threshold=dedup_threshold)
+    return engine.run(target_url, skip_batches=skip_batches, max_batches=max_batches)
 
 if __name__ == "__main__":
     logging.info("Starting review scraping...")
     try:
         reviews = scrape_reviews()
-        if reviews:
-            save_to_csv(reviews)
-        else:
+        if not reviews:
             logging.warning("Failed to scrape any reviews. Possible solutions:")
             logging.warning("1. Check browser window for CAPTCHAs or blocks")
             logging.warning("2. Right-click a review and 'Inspect' to share HTML structure")
-            logging.warning("3. Check 'page_content.html' for the saved page HTML")
+            logging.warning("3. Check the 'artifacts' directory for the saved page HTML")
     except Exception as e:
-        logging.error(f"Critical error in main execution: {e}")
\ No newline at end of file
+        logging.error(f"Critical error in main execution: {e}")
@@ -0,0 +1,313 @@
+"""Local stand-in for the Amazon and Influenster review pages, for offline benchmarks.
+
+Amazon pages honour `filterByStar` and `pageNumber` and render a "Next page" link;
+Influenster pages render `UgcContainer` cards (markup taken from the captured
+page_content.html when available) and a "Load More" button that fetches the next
+batch. Review texts and ratings are sampled from the CSVs already in the repo.
+"""
+import csv
+import glob
+import html
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+AMAZON_ASIN = 'B0MOCK0001'
+INFLUENSTER_SLUG = 'mock-body-lotion-for-sensitive-skin'
+AMAZON_PAGE_SIZE = 10
+INFLUENSTER_BATCH_SIZE = 10
+
+STAR_FILTERS = {'five_star': 5, 'four_star': 4, 'three_star': 3, 'two_star': 2, 'one_star': 1}
+
+FALLBACK_TEXTS = [
+    ("Absorbs quickly and keeps my skin soft all day without feeling greasy.", 5),
+    ("Nice texture but the pump broke after a week.", 3),
+    ("Caused a rash and itching on my arms, had to stop using it.", 1),
+    ("Gentle on sensitive skin and has no strong fragrance.", 4),
+    ("Too runny and did not hydrate enough for my dry skin.", 2),
+]
+
+# Class names the Influenster scraper matches on; overridden by the captured page when present
+INFLUENSTER_CARD_TEMPLATE = (
+    '<div class="UgcContainer_ugc-container__IaS28"><div class="UgcHeader_ugc-header__sbLjZ">'
+    '<h5 class="MiniProfileTimestamp_mini-profile-timestamp__profile-name__xNQr7">{username}</h5>'
+    '<time datetime="{datetime}">{relative}</time></div>'
+    '<div class="UgcBody_ugc-body__VuMOu"><div class="StarRating_star-rating__TY9Ar">'
+    '<div class="StarRating_star-rating__rating-text__3WSu1">{rating}<!-- --> / 5</div></div>'
+    '<div class="Review_review__body-text__7LQFd">{text}</div></div></div>'
+)
+
+AMAZON_CARD_TEMPLATE = (
+    '<div data-hook="review" id="customer_review-{review_id}" class="a-section review aok-relative">'
+    '<div class="a-profile-content"><span class="a-profile-name">{username}</span></div>'
+    '<i data-hook="review-star-rating" class="a-icon a-icon-star"><span class="a-icon-alt">{rating}.0 out of 5 stars</span></i>'
+    '<a data-hook="review-title" class="review-title" href="#"><span>{title}</span></a>'
+    '<span data-hook="review-date" class="review-date">Reviewed in India on {date}</span>'
+    '<span data-hook="avp-badge" class="a-size-mini a-color-state">Verified Purchase</span>'
+    '<span data-hook="review-body" class="review-text-content"><span>{text}</span></span>'
+    '<span data-hook="helpful-vote-statement" class="a-size-base a-color-tertiary">{helpful} people found this helpful</span>'
+    '</div>'
+)
+
+
+def _outer_div(source, start):
+    """Return the <div> element starting at `start`, matched by tag depth."""
+    depth = 0
+    for match in re.finditer(r'<div\b|</div>', source[start:]):
+        depth += 1 if match.group(0) == '<div' else -1
+        if depth == 0:
+            return source[start:start + match.end()]
+    return None
+
+
+def load_influenster_template(path=os.path.join(REPO_DIR, 'page_content.html')):
+    """Turn the first review card of a captured Influenster page into a format template."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+    except OSError:
+        return INFLUENSTER_CARD_TEMPLATE
+    start = source.find('<div class="UgcContainer_ugc-container__')
+    card = _outer_div(source, start) if start >= 0 else None
+    if not card:
+        return INFLUENSTER_CARD_TEMPLATE
+    card = card.replace('{', '{{').replace('}', '}}')
+    card = re.sub(r'(profile-name__\w+">)[^<]*(</h5>)', r'\1{username}\2', card, count=1)
+    card = re.sub(r'<time datetime="[^"]*">[^<]*</time>', '<time datetime="{datetime}">{relative}</time>', card, count=1)
+    card = re.sub(r'(rating-text__\w+">)\d+', r'\1{rating}', card, count=1)
+    card = re.sub(r'(body-text__\w+">).*?(</div>)', r'\1{text}\2', card, count=1, flags=re.S)
+    # Drop images so the browser never reaches out to the real CDN
+    card = re.sub(r'<img\b[^>]*>', '', card)
+    return card
+
+
+def load_corpus(repo_dir=REPO_DIR):
+    """(text, rating) pairs sampled from the review CSVs checked into the repo."""
+    corpus = []
+    paths = glob.glob(os.path.join(repo_dir, 'amazon_reviews*.csv')) + glob.glob(os.path.join(repo_dir, 'scraped_reviews', '*.csv'))
+    for path in sorted(paths)[:6]:
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    text = row.get('text') or row.get('review_text')
+                    match = re.match(r'\s*(\d)', str(row.get('rating', '')))
+                    if text and match and 1 <= int(match.group(1)) <= 5:
+                        corpus.append((text, int(match.group(1))))
+        except (OSError, csv.Error):
+            continue
+    return corpus or FALLBACK_TEXTS
+
+
+class MockReviewSite:
+    """Threaded HTTP server serving mock Amazon and Influenster review pages.
+
+    `latency` (seconds) and `jitter` delay every response; request timings are
+    recorded in `requests` for the benchmark harness.
+    """
+
+    def __init__(self, amazon_reviews=60, influenster_reviews=60, latency=0.2, jitter=0.05,
+                 seed=1234, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = []
+        self._lock = threading.Lock()
+        rng = random.Random(seed)
+        corpus = load_corpus()
+        self.amazon = self._generate(rng, corpus, amazon_reviews)
+        self.influenster = self._generate(rng, corpus, influenster_reviews)
+        self.influenster_template = load_influenster_template()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _generate(rng, corpus, count):
+        today = datetime(2025, 4, 27)
+        reviews = []
+        for i in range(count):
+            text, rating = rng.choice(corpus)
+            reviews.append({
+                'index': i,
+                'username': f"Mock U{i}.",
+                'title': f"Review #{i}: {' '.join(text.split()[:6])}",
+                'rating': rating,
+                'date': today - timedelta(days=i),
+                'text': text,
+                'helpful': rng.randint(0, 40),
+            })
+        return reviews
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def amazon_url(self):
+        return f"{self.base_url}/product-reviews/{AMAZON_ASIN}/ref=cm_cr_dp_d_show_all_btm?ie=UTF8&reviewerType=all_reviews"
+
+    @property
+    def influenster_url(self):
+        return f"{self.base_url}/reviews/{INFLUENSTER_SLUG}/reviews"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = []
+
+    def record(self, kind, path, started, duration):
+        with self._lock:
+            self.requests.append({'kind': kind, 'path': path, 'started': started, 'duration': duration})
+
+    def page_requests(self, kinds):
+        with self._lock:
+            return [r for r in self.requests if r['kind'] in kinds]
+
+    # Page rendering
+
+    def render_amazon(self, query):
+        star_filter = query.get('filterByStar', [''])[0]
+        stars = STAR_FILTERS.get(star_filter)
+        try:
+            page_num = max(int(query.get('pageNumber', ['1'])[0]), 1)
+        except ValueError:
+            page_num = 1
+        reviews = [r for r in self.amazon if stars is None or r['rating'] == stars]
+        start = (page_num - 1) * AMAZON_PAGE_SIZE
+        cards = ''.join(AMAZON_CARD_TEMPLATE.format(
+            review_id=f"R{r['index']:08d}",
+            username=html.escape(r['username']),
+            rating=r['rating'],
+            title=html.escape(r['title']),
+            date=f"{r['date'].day} {r['date'].strftime('%B %Y')}",
+            text=html.escape(r['text']),
+            helpful=r['helpful'],
+        ) for r in reviews[start:start + AMAZON_PAGE_SIZE])
+        if start + AMAZON_PAGE_SIZE < len(reviews):
+            params = {k: v[0] for k, v in query.items()}
+            params['pageNumber'] = str(page_num + 1)
+            href = html.escape('?' + '&'.join(f"{k}={v}" for k, v in params.items()))
+            next_link = f'<li class="a-last"><a href="{href}">Next page<span class="a-letter-space"></span></a></li>'
+        else:
+            next_link = '<li class="a-disabled a-last">Next page</li>'
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Amazon.in:Customer reviews</title></head><body>'
+            f'<div data-hook="cr-filter-info-section"><span>{len(reviews)} total ratings, {len(reviews)} with reviews</span></div>'
+            f'<div id="cm_cr-review_list" class="a-section a-spacing-none review-views celwidget">{cards}'
+            f'<div data-hook="pagination-bar"><ul class="a-pagination"><li class="a-normal">{page_num}</li>{next_link}</ul></div>'
+            '</div></body></html>'
+        )
+
+    def render_influenster_cards(self, offset):
+        cards = []
+        for r in self.influenster[offset:offset + INFLUENSTER_BATCH_SIZE]:
+            cards.append(self.influenster_template.format(
+                username=html.escape(r['username']),
+                datetime=r['date'].strftime('%Y-%m-%dT12:00:00.000Z'),
+                relative=f"{r['index'] + 1} days ago",
+                rating=r['rating'],
+                text=html.escape(r['text']),
+            ))
+        return ''.join(cards)
+
+    def render_influenster(self):
+        has_more = INFLUENSTER_BATCH_SIZE < len(self.influenster)
+        button = ('<button class="InfiniteScroll_infinite-scroll__load-more-button____P4C" '
+                  'onclick="loadMore(this)">Load More</button>') if has_more else ''
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Influenster reviews</title></head><body>'
+            f'<div class="ProductReviewsPanel_product-reviews-panel__header__count__iQyHh">{len(self.influenster)} Reviews</div>'
+            f'<div class="InfiniteScroll_infinite-scroll__9H3zS"><div id="ugc-list">{self.render_influenster_cards(0)}</div>{button}</div>'
+            '<script>'
+            f'var nextOffset = {INFLUENSTER_BATCH_SIZE};'
+            'function loadMore(button) {'
+            f'  fetch("/reviews/{INFLUENSTER_SLUG}/more?offset=" + nextOffset).then(r => r.json()).then(data => {{'
+            '    document.getElementById("ugc-list").insertAdjacentHTML("beforeend", data.html);'
+            '    nextOffset = data.next;'
+            '    if (!data.hasMore) { button.remove(); }'
+            '  });'
+            '}'
+            '</script></body></html>'
+        )
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type='text/html; charset=utf-8', status=200):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                started = time.time()
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if site.latency:
+                    time.sleep(max(0.0, site.latency + random.uniform(-site.jitter, site.jitter)))
+                if url.path.startswith('/product-reviews/'):
+                    kind, body, content_type = 'amazon_page', site.render_amazon(query), 'text/html; charset=utf-8'
+                elif url.path == f'/reviews/{INFLUENSTER_SLUG}/reviews':
+                    kind, body, content_type = 'influenster_page', site.render_influenster(), 'text/html; charset=utf-8'
+                elif url.path == f'/reviews/{INFLUENSTER_SLUG}/more':
+                    offset = int(query.get('offset', ['0'])[0])
+                    next_offset = offset + INFLUENSTER_BATCH_SIZE
+                    kind, content_type = 'influenster_more', 'application/json'
+                    body = json.dumps({
+                        'html': site.render_influenster_cards(offset),
+                        'next': next_offset,
+                        'hasMore': next_offset < len(site.influenster),
+                    })
+                else:
+                    self._send('Not found', 'text/plain', 404)
+                    return
+                self._send(body, content_type)
+                site.record(kind, self.path, started, time.time() - started)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve mock Amazon/Influenster review pages")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--amazon-reviews', type=int, default=60)
+    parser.add_argument('--influenster-reviews', type=int, default=60)
+    parser.add_argument('--latency', type=float, default=0.2)
+    args = parser.parse_args()
+    site = MockReviewSite(args.amazon_reviews, args.influenster_reviews, args.latency, port=args.port).start()
+    print(f"Amazon:      {site.amazon_url}")
+    print(f"Influenster: {site.influenster_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,186 @@
+"""MinHash / LSH near-duplicate detection for review texts.
+
+Reviews are reduced to word 3-gram shingles, summarised by a MinHash signature
+and bucketed by LSH bands, so finding the near-duplicates of a review only
+compares it against the few reviews sharing a bucket instead of all pairs.
+Texts shorter than `min_tokens` words are not indexed: short generic reviews
+("Good product") are common and are not the same review.
+"""
+import os
+import re
+import struct
+from array import array
+from functools import lru_cache
+from hashlib import blake2b
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Estimated Jaccard similarity at which two reviews count as near-duplicates
+DEFAULT_THRESHOLD = float(os.environ.get('NEAR_DUP_THRESHOLD', 0.8))
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+DEFAULT_MIN_TOKENS = 8
+
+
+def normalize_text(text):
+    """Lowercase, strip punctuation and collapse whitespace, so formatting changes don't matter."""
+    if not isinstance(text, str):
+        return ''
+    text = text.lower().replace('’', "'")
+    text = re.sub(r'\bread more\b', ' ', text)
+    return ' '.join(re.findall(r"[\w']+", text))
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """Set of word n-grams of the normalized text."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash64(value):
+    return int.from_bytes(blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _integrate(f, low, high, steps=100):
+    """Trapezoid-rule integral of f over [low, high]."""
+    step = (high - low) / steps
+    return step * (f(low) / 2 + sum(f(low + i * step) for i in range(1, steps)) + f(high) / 2)
+
+
+@lru_cache(maxsize=None)
+def lsh_params(threshold, num_perm, false_positive_weight=0.1, false_negative_weight=0.9):
+    """Pick (bands, rows) with bands * rows <= num_perm minimising the weighted false positive
+    and false negative areas of the LSH S-curve around threshold.
+
+    Candidates are verified against the full signature afterwards, so a false positive only
+    costs a comparison while a false negative is a missed duplicate; the default weights
+    put the S-curve midpoint below the threshold (14 x 9 at 0.8, ~87% recall at exactly 0.8).
+    """
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = _integrate(lambda s: 1 - (1 - s ** rows) ** bands, 0, threshold)
+            false_negative = _integrate(lambda s: (1 - s ** rows) ** bands, threshold, 1)
+            error = false_positive_weight * false_positive + false_negative_weight * false_negative
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def signature_to_bytes(signature):
+    return array('Q', signature).tobytes()
+
+
+def signature_from_bytes(data):
+    sig = array('Q')
+    sig.frombytes(data)
+    return tuple(sig)
+
+
+def group_pairs(pairs):
+    """Union-find over (a, b, ...) pairs; returns clusters (sorted lists) of size > 1."""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b, *_ in pairs:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+    clusters = {}
+    for x in parent:
+        clusters.setdefault(find(x), []).append(x)
+    return sorted((sorted(c) for c in clusters.values() if len(c) > 1), key=len, reverse=True)
+
+
+class MinHasher:
+    """Computes MinHash signatures and LSH band keys with fixed, seeded permutations."""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE,
+                 min_tokens=DEFAULT_MIN_TOKENS, seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        # Seeded so signatures stay comparable across runs and processes
+        self.permutations = [
+            (_hash64(f"a{seed}:{i}") % (MERSENNE_PRIME - 1) + 1, _hash64(f"b{seed}:{i}") % MERSENNE_PRIME)
+            for i in range(num_perm)
+        ]
+
+    def signature(self, text):
+        """MinHash signature of a text, or None if it is too short to compare."""
+        if len(normalize_text(text).split()) < self.min_tokens:
+            return None
+        hashes = [_hash64(s) for s in shingles(text, self.shingle_size)]
+        return tuple(
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        )
+
+    def band_keys(self, signature):
+        """One bucket key per band; reviews sharing any key are candidate duplicates."""
+        keys = []
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            digest = blake2b(struct.pack(f'<{self.rows}Q', *chunk), digest_size=8).digest()
+            keys.append(int.from_bytes(digest, 'little', signed=True))
+        return keys
+
+
+class MinHashLSH:
+    """In-memory near-duplicate index for use during a scrape.
+
+    `add` indexes a review and returns the near-duplicates already indexed;
+    `clusters` reports every group of near-duplicates seen so far.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, **hasher_options):
+        self.hasher = MinHasher(threshold, **hasher_options)
+        self.threshold = threshold
+        self.signatures = {}
+        self.buckets = [{} for _ in range(self.hasher.bands)]
+        self.pairs = []
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def query(self, text=None, signature=None):
+        """Indexed keys whose estimated similarity to the text is >= threshold, best first."""
+        signature = signature or self.hasher.signature(text)
+        if signature is None:
+            return []
+        candidates = set()
+        for band, key in enumerate(self.hasher.band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+        matches = [(other, similarity(signature, self.signatures[other])) for other in candidates]
+        return sorted((m for m in matches if m[1] >= self.threshold), key=lambda m: m[1], reverse=True)
+
+    def add(self, key, text):
+        """Index a review; returns [(duplicate_key, similarity), ...] for reviews it duplicates."""
+        signature = self.hasher.signature(text)
+        if signature is None or key in self.signatures:
+            return []
+        matches = self.query(signature=signature)
+        self.pairs.extend((key, other, sim) for other, sim in matches)
+        self.signatures[key] = signature
+        for band, band_key in enumerate(self.hasher.band_keys(signature)):
+            self.buckets[band].setdefault(band_key, []).append(key)
+        return matches
+
+    def clusters(self):
+        return group_pairs(self.pairs)
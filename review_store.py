@@ -0,0 +1,708 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from collections import Counter
+from hashlib import md5
+
+from near_dup import (DEFAULT_THRESHOLD, MinHasher, group_pairs, similarity,
+                      signature_from_bytes, signature_to_bytes)
+from term_stats import TermStats, extract_terms, sentiment_label
+
+try:
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+except ImportError:  # Sentiment is optional for the scrapers
+    SentimentIntensityAnalyzer = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.environ.get('REVIEW_STORE_PATH', 'reviews.db')
+
+# Unified columns every scraper row is normalized into
+REVIEW_FIELDS = ['id', 'product', 'site', 'author', 'title', 'rating', 'review_date',
+                 'text', 'verified', 'helpful', 'sentiment', 'source', 'scraped_at']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id TEXT PRIMARY KEY,
+    product TEXT NOT NULL,
+    site TEXT NOT NULL,
+    author TEXT,
+    title TEXT,
+    rating INTEGER,
+    review_date TEXT,
+    text TEXT,
+    verified INTEGER,
+    helpful INTEGER,
+    sentiment REAL,
+    source TEXT,
+    scraped_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_date ON reviews (product, review_date);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_rating ON reviews (product, rating);
+CREATE INDEX IF NOT EXISTS idx_reviews_date ON reviews (review_date);
+
+CREATE TABLE IF NOT EXISTS product_stats (
+    product TEXT PRIMARY KEY,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    sentiment_count INTEGER NOT NULL DEFAULT 0,
+    sentiment_sum REAL NOT NULL DEFAULT 0,
+    first_date TEXT,
+    last_date TEXT
+);
+CREATE TABLE IF NOT EXISTS rating_histogram (
+    product TEXT NOT NULL,
+    rating INTEGER NOT NULL,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (product, rating)
+);
+CREATE TABLE IF NOT EXISTS monthly_stats (
+    product TEXT NOT NULL,
+    month TEXT NOT NULL,
+    review_count INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    sentiment_count INTEGER NOT NULL DEFAULT 0,
+    sentiment_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (product, month)
+);
+
+-- Aggregates are maintained incrementally, in the same transaction as the insert
+CREATE TRIGGER IF NOT EXISTS reviews_aggregate_insert AFTER INSERT ON reviews
+BEGIN
+    INSERT INTO product_stats (product) VALUES (NEW.product) ON CONFLICT (product) DO NOTHING;
+    UPDATE product_stats SET
+        review_count = review_count + 1,
+        rating_count = rating_count + (NEW.rating IS NOT NULL),
+        rating_sum = rating_sum + COALESCE(NEW.rating, 0),
+        sentiment_count = sentiment_count + (NEW.sentiment IS NOT NULL),
+        sentiment_sum = sentiment_sum + COALESCE(NEW.sentiment, 0),
+        first_date = CASE WHEN NEW.review_date IS NOT NULL AND (first_date IS NULL OR NEW.review_date < first_date)
+                          THEN NEW.review_date ELSE first_date END,
+        last_date = CASE WHEN NEW.review_date IS NOT NULL AND (last_date IS NULL OR NEW.review_date > last_date)
+                         THEN NEW.review_date ELSE last_date END
+    WHERE product = NEW.product;
+
+    INSERT INTO rating_histogram (product, rating, review_count)
+    SELECT NEW.product, NEW.rating, 1 WHERE NEW.rating IS NOT NULL
+    ON CONFLICT (product, rating) DO UPDATE SET review_count = review_count + 1;
+
+    INSERT INTO monthly_stats (product, month, review_count, rating_count, rating_sum, sentiment_count, sentiment_sum)
+    SELECT NEW.product, substr(NEW.review_date, 1, 7), 1,
+           NEW.rating IS NOT NULL, COALESCE(NEW.rating, 0),
+           NEW.sentiment IS NOT NULL, COALESCE(NEW.sentiment, 0)
+    WHERE NEW.review_date IS NOT NULL
+    ON CONFLICT (product, month) DO UPDATE SET
+        review_count = review_count + 1,
+        rating_count = rating_count + excluded.rating_count,
+        rating_sum = rating_sum + excluded.rating_sum,
+        sentiment_count = sentiment_count + excluded.sentiment_count,
+        sentiment_sum = sentiment_sum + excluded.sentiment_sum;
+END;
+"""
+
+# Full-text index over title and body, kept in sync with the reviews table by trigger
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5(
+    title, text, content='reviews', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS reviews_fts_insert AFTER INSERT ON reviews
+BEGIN
+    INSERT INTO reviews_fts (rowid, title, text) VALUES (NEW.rowid, NEW.title, NEW.text);
+END;
+"""
+
+# Unigram/bigram counts per product and sentiment label, updated as reviews are added
+TERM_SCHEMA = """
+CREATE TABLE IF NOT EXISTS term_counts (
+    product TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    term TEXT NOT NULL,
+    term_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (product, sentiment, term)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS term_config (
+    version INTEGER NOT NULL
+);
+"""
+
+# Bump when term extraction or labelling changes, so stored counts are rebuilt on open
+TERM_COUNTS_VERSION = 3
+
+# MinHash signatures and LSH band buckets for near-duplicate lookups, plus the links found
+NEAR_DUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS review_minhash (
+    review_id TEXT PRIMARY KEY,
+    signature BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    review_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, review_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS near_duplicates (
+    review_id TEXT NOT NULL,
+    duplicate_of TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    skipped INTEGER NOT NULL,
+    product TEXT NOT NULL,
+    site TEXT NOT NULL,
+    PRIMARY KEY (review_id, duplicate_of)
+);
+CREATE INDEX IF NOT EXISTS idx_near_duplicates_product ON near_duplicates (product);
+CREATE TABLE IF NOT EXISTS lsh_config (
+    bands INTEGER NOT NULL,
+    rows INTEGER NOT NULL
+);
+"""
+
+# PRAGMA user_version of stores whose scraper ids are scoped to product and site
+REVIEW_ID_VERSION = 1
+
+SEARCH_MODES = ('any', 'all', 'raw')
+
+AMAZON_DATE_PATTERNS = ['%d %B %Y', '%B %d, %Y', '%d %b %Y', '%b %d, %Y']
+
+
+def parse_rating(value):
+    """Normalize a rating ('5.0 out of 5 stars', '4', 4, '3.0') to an int 1-5, or None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        rating = int(value)
+    else:
+        match = re.search(r'(\d+(?:\.\d+)?)', str(value))
+        if not match:
+            return None
+        rating = int(float(match.group(1)))
+    return rating if 1 <= rating <= 5 else None
+
+
+def parse_review_date(value):
+    """Normalize scraped dates to 'YYYY-MM-DD', or None when unparseable."""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    if re.match(r'^\d{4}-\d{2}-\d{2}', value):
+        return value[:10]
+    # Amazon: "Reviewed in India on 14 December 2024" / "... on September 3, 2021"
+    value = re.sub(r'^Reviewed in .*? on ', '', value)
+    for pattern in AMAZON_DATE_PATTERNS:
+        try:
+            return datetime.strptime(value, pattern).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_helpful(value):
+    """Convert '12 people found this helpful' / 'One person found this helpful' to an int."""
+    if isinstance(value, int):
+        return value
+    if not value or not isinstance(value, str):
+        return 0
+    match = re.search(r'([\d,]+)', value)
+    if match:
+        return int(match.group(1).replace(',', ''))
+    return 1 if value.lower().startswith('one') else 0
+
+
+def amazon_product_key(product_url):
+    """Extract the ASIN from an Amazon product or review URL."""
+    match = re.search(r'/(?:product-reviews|dp|gp/product)/([A-Z0-9]{10})', product_url)
+    return match.group(1) if match else product_url.strip()
+
+
+def influenster_product_key(target_url):
+    """Extract the product slug from an Influenster reviews URL."""
+    match = re.search(r'/reviews/([^/?#]+)', target_url)
+    return match.group(1) if match else target_url.strip()
+
+
+def build_match_query(query, mode='any'):
+    """Turn user input into an FTS5 MATCH expression.
+
+    'any' ORs the words, 'all' ANDs them, 'raw' passes FTS5 syntax through.
+    A trailing '*' on a word is kept as a prefix search (e.g. 'itch*').
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+    if not query or not query.strip():
+        raise ValueError("Empty search query")
+    if mode == 'raw':
+        return query
+    terms = []
+    for word in re.findall(r"[\w']+\*?", query):
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    if not terms:
+        raise ValueError(f"No searchable terms in '{query}'")
+    return (' OR ' if mode == 'any' else ' AND ').join(terms)
+
+
+def _clean(value):
+    """Treat scraper placeholders as missing values."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in ('', 'N/A', 'Unknown', 'Date not found', 'nan') else value
+
+
+def _content_id(site, product, author, title, rating, review_date, text):
+    content = f"{site}{product}{author or ''}{title or ''}{rating or ''}{review_date or ''}{text or ''}"
+    return md5(content.encode('utf-8')).hexdigest()
+
+
+def scoped_review_id(scraper_id, product, site):
+    """Store id for a scraper-assigned id. Amazon ids hash only the review content, and variant
+    listings share reviews, so the id is scoped to the product and site."""
+    return md5(f"{site}:{product}:{scraper_id}".encode('utf-8')).hexdigest()
+
+
+def normalize_review(raw, product, site, source=None):
+    """Map a raw row from either scraper (or a legacy CSV) onto the unified schema."""
+    text = _clean(raw.get('text')) or _clean(raw.get('review_text')) or _clean(raw.get('Review Text'))
+    title = _clean(raw.get('title'))
+    author = _clean(raw.get('author')) or _clean(raw.get('username'))
+    rating = parse_rating(raw.get('rating'))
+    review_date = parse_review_date(raw.get('date') or raw.get('review_date'))
+    scraper_id = _clean(raw.get('id'))
+    if scraper_id:
+        review_id = scoped_review_id(scraper_id, product, site)
+    else:
+        review_id = _content_id(site, product, author, title, rating, review_date, text)
+    verified = raw.get('verified')
+    if isinstance(verified, str):
+        verified = verified.strip().lower() in ('true', '1', 'yes')
+    return {
+        'id': review_id,
+        'product': product,
+        'site': site,
+        'author': author,
+        'title': title,
+        'rating': rating,
+        'review_date': review_date,
+        'text': text,
+        'verified': None if verified is None else int(bool(verified)),
+        'helpful': parse_helpful(raw.get('helpful')),
+        'sentiment': raw.get('sentiment'),
+        'source': source,
+        'scraped_at': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def is_recapture(review, other):
+    """Whether two near-duplicate normalized reviews are the same review captured twice.
+
+    With both authors known they must match. Otherwise shared boilerplate is common
+    ("This is a modal window..."), so the title, or the rating and date, must match too.
+    """
+    if review['author'] and other['author']:
+        return review['author'] == other['author']
+    if review['title'] and review['title'] == other['title']:
+        return True
+    return (review['review_date'] is not None and review['review_date'] == other['review_date']
+            and review['rating'] == other['rating'])
+
+
+class ReviewStore:
+    """SQLite-backed review store with incrementally maintained per-product aggregates."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, dedup_threshold=DEFAULT_THRESHOLD):
+        self.path = path
+        self._hasher = MinHasher(dedup_threshold)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        has_fts = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reviews_fts'").fetchone()
+        self._conn.executescript(FTS_SCHEMA)
+        self._conn.executescript(TERM_SCHEMA)
+        self._conn.executescript(NEAR_DUP_SCHEMA)
+        if not has_fts:
+            # Index reviews stored before full-text search was added
+            with self._conn:
+                self._conn.execute("INSERT INTO reviews_fts (reviews_fts) VALUES ('rebuild')")
+        self._migrate_review_ids()
+        self._check_lsh_config()
+        self._check_term_counts()
+        self._analyzer = SentimentIntensityAnalyzer() if SentimentIntensityAnalyzer else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _score(self, text):
+        if self._analyzer is None or not text:
+            return None
+        return self._analyzer.polarity_scores(text)['compound']
+
+    def add_reviews(self, reviews, product, site, source=None):
+        """Insert raw scraper rows; returns how many were new.
+
+        Exact duplicates are ignored by id. A near-duplicate of a stored review of the
+        same product and site that `is_recapture` is skipped; other near-duplicates,
+        e.g. a review syndicated to another site, are stored and linked in near_duplicates.
+        """
+        rows = []
+        for raw in reviews:
+            row = normalize_review(raw, product, site, source)
+            if row['sentiment'] is None:
+                row['sentiment'] = self._score(row['text'])
+            rows.append(row)
+        if not rows:
+            return 0
+        columns = ', '.join(REVIEW_FIELDS)
+        placeholders = ', '.join(f':{field}' for field in REVIEW_FIELDS)
+        added = 0
+        terms = {}
+        with self._lock, self._conn:
+            for row in rows:
+                if self._conn.execute('SELECT 1 FROM reviews WHERE id = ?', (row['id'],)).fetchone():
+                    continue
+                signature = self._hasher.signature(row['text'])
+                matches = self._near_duplicates(signature) if signature else []
+                recaptured = [m for m in matches if m['product'] == product and m['site'] == site
+                              and is_recapture(row, m)]
+                self._conn.executemany(
+                    """INSERT OR IGNORE INTO near_duplicates (review_id, duplicate_of, similarity, skipped, product, site)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    [(row['id'], m['id'], m['similarity'], int(bool(recaptured)), product, site) for m in matches])
+                if recaptured:
+                    logger.info(f"Review store: skipped near-duplicate of {recaptured[0]['id']} "
+                                f"(similarity {recaptured[0]['similarity']:.2f})")
+                    continue
+                # rowcount excludes the aggregate trigger writes, so it is 1 only for a new review
+                cursor = self._conn.execute(
+                    f'INSERT OR IGNORE INTO reviews ({columns}) VALUES ({placeholders})', row)
+                if cursor.rowcount != 1:
+                    continue
+                added += 1
+                if signature:
+                    self._index_signature(row['id'], signature)
+                label = sentiment_label(row['sentiment'], row['rating'])
+                if label and row['text']:
+                    terms.setdefault(label, Counter()).update(extract_terms(row['text']))
+            self._insert_term_counts(product, terms)
+        logger.info(f"Review store: {added} new reviews for {site}/{product}")
+        return added
+
+    def _near_duplicates(self, signature):
+        """Stored reviews whose estimated similarity to the signature reaches the threshold (caller holds the lock)."""
+        candidates = set()
+        for band, bucket in enumerate(self._hasher.band_keys(signature)):
+            candidates.update(r[0] for r in self._conn.execute(
+                'SELECT review_id FROM lsh_buckets WHERE band = ? AND bucket = ?', (band, bucket)))
+        matches = []
+        for review_id in candidates:
+            row = self._conn.execute(
+                """SELECT r.id, r.product, r.site, r.author, r.title, r.rating, r.review_date, m.signature
+                   FROM review_minhash m
+                   JOIN reviews r ON r.id = m.review_id WHERE m.review_id = ?""", (review_id,)).fetchone()
+            if row is None:
+                continue
+            sim = similarity(signature, signature_from_bytes(row['signature']))
+            if sim >= self._hasher.threshold:
+                matches.append({'id': row['id'], 'product': row['product'], 'site': row['site'],
+                                'author': row['author'], 'title': row['title'], 'rating': row['rating'],
+                                'review_date': row['review_date'], 'similarity': round(sim, 4)})
+        return sorted(matches, key=lambda m: m['similarity'], reverse=True)
+
+    def _index_signature(self, review_id, signature):
+        self._conn.execute('INSERT OR REPLACE INTO review_minhash (review_id, signature) VALUES (?, ?)',
+                           (review_id, signature_to_bytes(signature)))
+        self._conn.executemany('INSERT OR IGNORE INTO lsh_buckets (band, bucket, review_id) VALUES (?, ?, ?)',
+                               [(band, bucket, review_id)
+                                for band, bucket in enumerate(self._hasher.band_keys(signature))])
+
+    def _migrate_review_ids(self):
+        """Scope ids of stores written when scraper ids were stored as-is (schema version 0) to their product."""
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] >= REVIEW_ID_VERSION:
+            return
+        renamed = []
+        for r in self._conn.execute(
+                'SELECT id, product, site, author, title, rating, review_date, text FROM reviews'):
+            # Ids computed from content already include the product and site
+            if r['id'] != _content_id(r['site'], r['product'], r['author'], r['title'], r['rating'],
+                                      r['review_date'], r['text']):
+                renamed.append((scoped_review_id(r['id'], r['product'], r['site']), r['id']))
+        with self._conn:
+            self._conn.executemany('UPDATE reviews SET id = ? WHERE id = ?', renamed)
+            self._conn.executemany('UPDATE review_minhash SET review_id = ? WHERE review_id = ?', renamed)
+            self._conn.executemany('UPDATE lsh_buckets SET review_id = ? WHERE review_id = ?', renamed)
+            self._conn.executemany('UPDATE near_duplicates SET review_id = ? WHERE review_id = ?', renamed)
+            self._conn.executemany('UPDATE near_duplicates SET duplicate_of = ? WHERE duplicate_of = ?', renamed)
+            self._conn.execute(f'PRAGMA user_version = {REVIEW_ID_VERSION}')
+        if renamed:
+            logger.info(f"Review store: scoped {len(renamed)} scraper review ids to their product")
+
+    def _check_term_counts(self):
+        """Rebuild term counts once for stores written before they existed or before extraction changed."""
+        row = self._conn.execute('SELECT version FROM term_config').fetchone()
+        if row is not None and row[0] == TERM_COUNTS_VERSION:
+            return
+        rebuilt = self.rebuild_term_counts()
+        with self._conn:
+            self._conn.execute('DELETE FROM term_config')
+            self._conn.execute('INSERT INTO term_config (version) VALUES (?)', (TERM_COUNTS_VERSION,))
+        if rebuilt:
+            logger.info(f"Review store: rebuilt term counts from {rebuilt} reviews")
+
+    def rebuild_term_counts(self):
+        """Recompute term_counts from every stored review; returns how many reviews were counted."""
+        counted = 0
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM term_counts')
+            for product in [r[0] for r in self._conn.execute('SELECT DISTINCT product FROM reviews')]:
+                terms = {}
+                for r in self._conn.execute(
+                        'SELECT text, sentiment, rating FROM reviews WHERE product = ? AND text IS NOT NULL', (product,)):
+                    label = sentiment_label(r['sentiment'], r['rating'])
+                    if label:
+                        terms.setdefault(label, Counter()).update(extract_terms(r['text']))
+                        counted += 1
+                self._insert_term_counts(product, terms)
+        return counted
+
+    def _insert_term_counts(self, product, terms):
+        self._conn.executemany(
+            """INSERT INTO term_counts (product, sentiment, term, term_count) VALUES (?, ?, ?, ?)
+               ON CONFLICT (product, sentiment, term) DO UPDATE SET term_count = term_count + excluded.term_count""",
+            [(product, label, term, count) for label, counts in terms.items() for term, count in counts.items()])
+
+    def _check_lsh_config(self):
+        """Re-bucket stored signatures when the band/row split differs from the one they were indexed with."""
+        config = (self._hasher.bands, self._hasher.rows)
+        row = self._conn.execute('SELECT bands, rows FROM lsh_config').fetchone()
+        if row is not None and tuple(row) == config:
+            return
+        with self._conn:
+            self._conn.execute('DELETE FROM lsh_config')
+            self._conn.execute('INSERT INTO lsh_config (bands, rows) VALUES (?, ?)', config)
+            self._conn.execute('DELETE FROM lsh_buckets')
+            signatures = self._conn.execute('SELECT review_id, signature FROM review_minhash').fetchall()
+            for r in signatures:
+                self._index_signature(r['review_id'], signature_from_bytes(r['signature']))
+        if signatures:
+            logger.info(f"Review store: re-bucketed {len(signatures)} signatures for LSH {config[0]}x{config[1]}")
+
+    def find_near_duplicates(self, text):
+        """Stored reviews that are near-duplicates of the given text."""
+        signature = self._hasher.signature(text)
+        if signature is None:
+            return []
+        with self._lock:
+            return self._near_duplicates(signature)
+
+    def duplicate_clusters(self, product=None):
+        """Groups of near-duplicate review ids recorded so far, largest first."""
+        query = 'SELECT review_id, duplicate_of, skipped FROM near_duplicates'
+        params = []
+        if product:
+            query += ' WHERE product = ?'
+            params.append(product)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        skipped = {r['review_id'] for r in rows if r['skipped']}
+        return [{'size': len(cluster), 'reviewIds': cluster, 'skippedIds': [i for i in cluster if i in skipped]}
+                for cluster in group_pairs(rows)]
+
+    def reindex_near_duplicates(self):
+        """Index reviews stored before near-duplicate indexing and link their near-duplicates; returns how many.
+
+        Reviews are indexed in insertion order, so each is linked to the earlier reviews it duplicates.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT id, product, site, text FROM reviews WHERE id NOT IN (SELECT review_id FROM review_minhash)
+                   ORDER BY rowid""").fetchall()
+        indexed = 0
+        for row in rows:
+            signature = self._hasher.signature(row['text'])
+            if signature is None:
+                continue
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    """INSERT OR IGNORE INTO near_duplicates (review_id, duplicate_of, similarity, skipped, product, site)
+                       VALUES (?, ?, ?, 0, ?, ?)""",
+                    [(row['id'], m['id'], m['similarity'], row['product'], row['site'])
+                     for m in self._near_duplicates(signature)])
+                self._index_signature(row['id'], signature)
+            indexed += 1
+        return indexed
+
+    def products(self):
+        """Per-product summary rows, straight from the aggregate table."""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM product_stats ORDER BY product').fetchall()
+        return [self._summary(row) for row in rows]
+
+    def product_stats(self, product):
+        """Summary and rating histogram for one product, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM product_stats WHERE product = ?', (product,)).fetchone()
+            histogram = self._conn.execute(
+                'SELECT rating, review_count FROM rating_histogram WHERE product = ? ORDER BY rating',
+                (product,)).fetchall()
+        if row is None:
+            return None
+        stats = self._summary(row)
+        stats['ratingHistogram'] = {str(r['rating']): r['review_count'] for r in histogram}
+        return stats
+
+    def monthly_series(self, product, start=None, end=None):
+        """Monthly review counts, average rating and average sentiment for one product."""
+        query = 'SELECT * FROM monthly_stats WHERE product = ?'
+        params = [product]
+        if start:
+            query += ' AND month >= ?'
+            params.append(start[:7])
+        if end:
+            query += ' AND month <= ?'
+            params.append(end[:7])
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY month', params).fetchall()
+        return [{
+            'month': r['month'],
+            'reviewCount': r['review_count'],
+            'averageRating': round(r['rating_sum'] / r['rating_count'], 3) if r['rating_count'] else None,
+            'averageSentiment': round(r['sentiment_sum'] / r['sentiment_count'], 4) if r['sentiment_count'] else None,
+        } for r in rows]
+
+    def term_stats(self, product):
+        """TermStats for one product, loaded from the incrementally maintained counts."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT sentiment, term, term_count FROM term_counts WHERE product = ?', (product,)).fetchall()
+        counts = {}
+        for r in rows:
+            counts.setdefault(r['sentiment'], {})[r['term']] = r['term_count']
+        return TermStats(counts)
+
+    def search(self, query, mode='any', products=None, min_rating=None, max_rating=None,
+               start=None, end=None, limit=50, offset=0):
+        """Ranked (BM25) full-text search with optional product, rating and date filters.
+
+        Raises ValueError for an empty or malformed query, a limit below 1 or a negative offset
+        (SQLite would treat a negative LIMIT as no limit).
+        """
+        match = build_match_query(query, mode)
+        limit, offset = int(limit), int(offset)
+        if limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        if offset < 0:
+            raise ValueError(f"offset must not be negative, got {offset}")
+        sql = """
+            SELECT r.id, r.product, r.site, r.author, r.title, r.rating, r.review_date, r.sentiment,
+                   snippet(reviews_fts, 1, '[', ']', '...', 16) AS snippet, bm25(reviews_fts) AS score
+            FROM reviews_fts JOIN reviews r ON r.rowid = reviews_fts.rowid
+            WHERE reviews_fts MATCH ?
+        """
+        params = [match]
+        if products:
+            sql += f" AND r.product IN ({', '.join('?' * len(products))})"
+            params.extend(products)
+        if min_rating is not None:
+            sql += ' AND r.rating >= ?'
+            params.append(int(min_rating))
+        if max_rating is not None:
+            sql += ' AND r.rating <= ?'
+            params.append(int(max_rating))
+        if start:
+            sql += ' AND r.review_date >= ?'
+            params.append(start)
+        if end:
+            sql += ' AND r.review_date <= ?'
+            params.append(end)
+        sql += ' ORDER BY score LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query '{query}': {e}")
+        return [{
+            'id': r['id'],
+            'product': r['product'],
+            'site': r['site'],
+            'author': r['author'],
+            'title': r['title'],
+            'rating': r['rating'],
+            'date': r['review_date'],
+            'sentiment': r['sentiment'],
+            'snippet': r['snippet'],
+            'score': round(-r['score'], 4),
+        } for r in rows]
+
+    @staticmethod
+    def _summary(row):
+        return {
+            'product': row['product'],
+            'reviewCount': row['review_count'],
+            'averageRating': round(row['rating_sum'] / row['rating_count'], 3) if row['rating_count'] else None,
+            'averageSentiment': round(row['sentiment_sum'] / row['sentiment_count'], 4) if row['sentiment_count'] else None,
+            'firstDate': row['first_date'],
+            'lastDate': row['last_date'],
+        }
+
+    def import_csv(self, path, product=None, site=None):
+        """Load a legacy CSV export; site is inferred from the header if omitted.
+
+        Influenster exports are named after the product, so their product defaults to
+        the filename prefix. Amazon exports are all named amazon_reviews_*.csv, so the
+        product (the ASIN the live scraper uses) is required and ValueError is raised
+        without it.
+        """
+        import csv
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            if site is None:
+                site = 'influenster' if 'username' in fieldnames else 'amazon'
+            if product is None:
+                if site == 'amazon':
+                    raise ValueError(f"{path}: Amazon exports don't record the product, pass its ASIN as product (--product)")
+                product = os.path.basename(path).split('_reviews')[0].lower()
+            return self.add_reviews(reader, product, site, source=os.path.basename(path))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Import scraped review CSVs into the review store")
+    parser.add_argument('paths', nargs='*', help="CSV files to import")
+    parser.add_argument('--product', help="Product key: the ASIN for Amazon exports (required), "
+                                          "defaults to the filename prefix for Influenster")
+    parser.add_argument('--site', choices=['amazon', 'influenster'], help="Source site (inferred from columns)")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Store path")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Similarity at which reviews count as near-duplicates (env NEAR_DUP_THRESHOLD)")
+    parser.add_argument('--reindex-duplicates', action='store_true',
+                        help="Index reviews stored before near-duplicate detection was added")
+    parser.add_argument('--rebuild-terms', action='store_true', help="Recompute term counts from all stored reviews")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = ReviewStore(args.db, dedup_threshold=args.threshold)
+    if args.reindex_duplicates:
+        print(f"Indexed {store.reindex_near_duplicates()} reviews for near-duplicate detection")
+    if args.rebuild_terms:
+        print(f"Rebuilt term counts from {store.rebuild_term_counts()} reviews")
+    for csv_path in args.paths:
+        try:
+            added = store.import_csv(csv_path, product=args.product, site=args.site)
+        except ValueError as e:
+            print(f"Skipped {e}")
+            continue
+        print(f"{csv_path}: {added} new reviews")
+    for summary in store.products():
+        print(summary)
+    store.close()
@@ -0,0 +1,148 @@
+"""Learned selector order for the scrapers' fallback chains.
+
+For every (site, selector group) — e.g. the review title on www.amazon.in — the
+cache remembers which candidate matched last and tries it first on later pages
+and runs, so a layout that matches a late fallback stops paying for the failed
+probes (and their timeouts) before it; the other candidates are probed, in their
+original order, only when the winner misses. Candidates are ordered most specific
+first, so on the first lookup of each run and every `recheck_every`-th after it,
+once a later fallback has matched, the more specific candidates before it are
+re-checked with a cheap probe (e.g. an instant query_selector rather than a timed
+wait); if one matches it becomes the winner, so a loose fallback that won once
+(e.g. after one slow load) does not shadow the specific selector for good.
+Groups where "no element" is a normal result should pass `learn=False`. Winners and cumulative hit counts
+persist in a JSON file; per-run probe statistics are available from `run_stats`.
+"""
+import json
+import logging
+import os
+import tempfile
+from collections import Counter
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.environ.get('SELECTOR_CACHE_PATH', 'selector_cache.json')
+
+
+def site_key(url):
+    """Cache key for a page layout: the host, e.g. 'www.amazon.in'."""
+    return urlparse(url.strip()).netloc or url.strip()
+
+
+class SelectorCache:
+    """Per-site winner cache for ordered selector fallbacks."""
+
+    def __init__(self, site, path=DEFAULT_CACHE_PATH, recheck_every=20):
+        self.site = site
+        self.path = path
+        self.recheck_every = recheck_every
+        self.groups = {}
+        self.run = {}
+        self._delta = {}  # group -> {'hits': Counter, 'misses': Counter} recorded by this instance
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.groups = json.load(f).get(site, {})
+        except (OSError, ValueError):
+            pass
+
+    def order(self, group, candidates):
+        """Candidates with the cached winner (if still a candidate) moved to the front."""
+        winner = self.groups.get(group, {}).get('winner')
+        if winner in candidates:
+            return [winner] + [c for c in candidates if c != winner]
+        return list(candidates)
+
+    def record(self, group, selector, hit, first_try=False, learn=True):
+        entry = self.groups.setdefault(group, {'winner': None, 'hits': {}, 'misses': {}})
+        bucket = 'hits' if hit else 'misses'
+        entry[bucket][selector] = entry[bucket].get(selector, 0) + 1
+        self._delta.setdefault(group, {'hits': Counter(), 'misses': Counter()})[bucket][selector] += 1
+        run = self.run.setdefault(group, Counter())
+        run['probes'] += 1
+        if hit:
+            run['hits'] += 1
+            run['first_try_hits'] += first_try
+            if learn and entry['winner'] != selector:
+                if entry['winner']:
+                    logger.info(f"Selector cache: '{group}' on {self.site} now matches {selector} (was {entry['winner']})")
+                entry['winner'] = selector
+
+    def first_match(self, group, candidates, probe, learn=True, recheck_probe=None):
+        """Return (selector, result) for the first candidate whose probe returns a truthy result.
+
+        Candidates are tried in cached order; a probe that raises counts as a miss.
+        `recheck_probe` (default: `probe`) is used for the periodic re-check of the
+        candidates ahead of a fallback winner; pass a cheap one when `probe` waits.
+        With `learn=False` (groups where a missing element is normal, so a loose
+        fallback can match by accident) the original order is always used and no
+        winner is cached; probes are still counted. Returns (None, None) when nothing matches.
+        """
+        run = self.run.setdefault(group, Counter())
+        run['lookups'] += 1
+        ordered = self.order(group, candidates) if learn else list(candidates)
+        for i, selector in enumerate(ordered):
+            try:
+                result = probe(selector)
+            except Exception:
+                result = None
+            self.record(group, selector, bool(result), first_try=(i == 0), learn=learn)
+            if result:
+                if learn and (run['lookups'] - 1) % self.recheck_every == 0:
+                    self._recheck(group, candidates, selector, recheck_probe or probe)
+                return selector, result
+        run['no_match'] += 1
+        return None, None
+
+    def _recheck(self, group, candidates, selector, probe):
+        """Promote a more specific candidate than the matched fallback if it matches now."""
+        for earlier in candidates[:candidates.index(selector)]:
+            try:
+                if probe(earlier):
+                    self.record(group, earlier, True)
+                    self.run[group]['rechecks_promoted'] += 1
+                    return
+            except Exception:
+                continue
+
+    def run_stats(self):
+        """Probe counts and hit rates for this run, per selector group."""
+        stats = {}
+        for group, run in sorted(self.run.items()):
+            stats[group] = {
+                'lookups': run['lookups'],
+                'probes': run['probes'],
+                'hit_rate': round(run['hits'] / run['probes'], 3) if run['probes'] else None,
+                'first_try_rate': round(run['first_try_hits'] / run['lookups'], 3) if run['lookups'] else None,
+                'no_match': run['no_match'],
+                'winner': self.groups.get(group, {}).get('winner'),
+            }
+        return stats
+
+    def save(self):
+        """Merge this run's counts and winners into the file, keeping what other processes saved meanwhile."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        groups = data.setdefault(self.site, {})
+        for group, delta in self._delta.items():
+            entry = groups.setdefault(group, {'winner': None, 'hits': {}, 'misses': {}})
+            for bucket in ('hits', 'misses'):
+                for selector, count in delta[bucket].items():
+                    entry[bucket][selector] = entry[bucket].get(selector, 0) + count
+            if delta['hits'] and self.groups[group]['winner']:
+                entry['winner'] = self.groups[group]['winner']
+        self.groups = groups
+        self._delta = {}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.selector_cache_', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save selector cache to {self.path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,132 @@
+import math
+import re
+from collections import Counter
+
+TOKEN_PATTERN = r"[a-z][a-z']*[a-z]|[a-z]"
+TOKEN_RE = re.compile(TOKEN_PATTERN)
+# Single letters ("m" from "5 m", "e" from "vitamin e") are tokenized so they still break
+# bigrams, but are never terms themselves
+MIN_TERM_LENGTH = 2
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before being below
+between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down during each
+even ever every few for from further get gets got had hadn't has hasn't have haven't having he he'd he'll he's
+her here here's hers herself him himself his how how's i i'd i'll i'm i've if im in into is isn't it it's its
+itself ive just let's like me more most much mustn't my myself no nor not now of off on once one only or other
+ought our ours ourselves out over own really same shan't she she'd she'll she's should shouldn't so some such
+than that that's the their theirs them themselves then there there's these they they'd they'll they're they've
+this those through to too under until up us use used using very was wasn't we we'd we'll we're we've were
+weren't what what's when when's where where's which while who who's whom why why's will with won't would
+wouldn't you you'd you'll you're you've your yours yourself yourselves dont doesnt didnt cant wont isnt
+product lotion
+""".split())
+
+SENTIMENTS = ('positive', 'negative')
+
+
+def tokenize(text):
+    """Lowercase word tokens of a review, stopwords included (needed for bigram adjacency)."""
+    if not isinstance(text, str):
+        return []
+    return TOKEN_RE.findall(text.lower().replace('’', "'"))
+
+
+def extract_terms(text):
+    """Count unigrams and bigrams in one review, skipping any term that contains a stopword or single letter."""
+    tokens = tokenize(text)
+    keep = [len(t) >= MIN_TERM_LENGTH and t not in STOPWORDS for t in tokens]
+    terms = Counter(t for t, k in zip(tokens, keep) if k)
+    terms.update(f"{a} {b}" for a, b, ka, kb in zip(tokens, tokens[1:], keep, keep[1:]) if ka and kb)
+    return terms
+
+
+def count_terms_frame(texts):
+    """Vectorized unigram + bigram counts over a pandas Series of review texts."""
+    import pandas as pd
+    tokens = texts.fillna('').astype(str).str.lower().str.replace('’', "'", regex=False).str.findall(TOKEN_PATTERN)
+    exploded = tokens.explode().dropna()
+    if exploded.empty:
+        return Counter()
+    frame = pd.DataFrame({'term': exploded.values, 'row': exploded.index})
+    frame['next'] = frame.groupby('row')['term'].shift(-1)
+    stop = frame['term'].isin(STOPWORDS) | (frame['term'].str.len() < MIN_TERM_LENGTH)
+    next_stop = frame['next'].isin(STOPWORDS) | (frame['next'].str.len() < MIN_TERM_LENGTH)
+    unigrams = frame.loc[~stop, 'term'].value_counts()
+    pairs = frame[~stop & frame['next'].notna() & ~next_stop]
+    bigrams = (pairs['term'] + ' ' + pairs['next']).value_counts()
+    counts = Counter(unigrams.to_dict())
+    counts.update(bigrams.to_dict())
+    return counts
+
+
+def sentiment_label(sentiment=None, rating=None):
+    """Label a review positive/negative from its VADER compound score, falling back to the rating.
+
+    Scores in VADER's neutral band (-0.05, 0.05) carry no polarity (text VADER has no
+    lexicon for, e.g. Spanish reviews, scores 0), so those also fall back to the rating.
+    """
+    if sentiment is not None:
+        if sentiment >= 0.05:
+            return 'positive'
+        if sentiment <= -0.05:
+            return 'negative'
+    if rating is not None:
+        if rating >= 4:
+            return 'positive'
+        if rating <= 2:
+            return 'negative'
+    return None
+
+
+class TermStats:
+    """Per-sentiment unigram/bigram counts that can be updated incrementally."""
+
+    def __init__(self, counts=None):
+        self.counts = {label: Counter() for label in SENTIMENTS}
+        for label, terms in (counts or {}).items():
+            self.counts[label].update(terms)
+
+    @classmethod
+    def from_frame(cls, texts, sentiments):
+        """Build from pandas Series of texts and 'positive'/'negative' labels (vectorized)."""
+        stats = cls()
+        for label in SENTIMENTS:
+            stats.counts[label].update(count_terms_frame(texts[sentiments == label]))
+        return stats
+
+    def update(self, text, label):
+        """Add one review's terms under the given sentiment label."""
+        if label in self.counts:
+            self.counts[label].update(extract_terms(text))
+
+    def top_terms(self, label, n=10):
+        return self.counts[label].most_common(n)
+
+    def log_odds(self, n=20, prior_weight=0.1, min_count=3):
+        """Terms most distinctive of positive vs negative reviews.
+
+        Log-odds ratio with an informative Dirichlet prior (Monroe et al., 2008),
+        using the pooled counts as the prior. Returns (positive, negative) lists of
+        dicts sorted by z-score, most distinctive first.
+        """
+        pos, neg = self.counts['positive'], self.counts['negative']
+        n_pos, n_neg = sum(pos.values()), sum(neg.values())
+        total = n_pos + n_neg
+        if not n_pos or not n_neg:
+            return [], []
+        alpha0 = max(prior_weight * total, 1.0)
+        scored = []
+        for term in pos.keys() | neg.keys():
+            c_pos, c_neg = pos[term], neg[term]
+            if c_pos + c_neg < min_count:
+                continue
+            alpha = alpha0 * (c_pos + c_neg) / total
+            delta = (math.log((c_pos + alpha) / (n_pos + alpha0 - c_pos - alpha))
+                     - math.log((c_neg + alpha) / (n_neg + alpha0 - c_neg - alpha)))
+            z = delta / math.sqrt(1 / (c_pos + alpha) + 1 / (c_neg + alpha))
+            scored.append({'term': term, 'z': round(z, 3), 'positive': c_pos, 'negative': c_neg})
+        scored.sort(key=lambda item: item['z'], reverse=True)
+        positive = [item for item in scored[:n] if item['z'] > 0]
+        negative = [item for item in reversed(scored[-n:]) if item['z'] < 0]
+        return positive, negative
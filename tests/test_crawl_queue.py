@@ -0,0 +1,57 @@
+import time
+
+from crawl_queue import SQLiteWorkQueue
+
+URL = 'https://www.amazon.in/product-reviews/B07L1SP25K/'
+REVIEW = {'id': 'r1', 'title': 'Nice', 'rating': '5.0 out of 5 stars', 'date': '', 'text': 'Works well'}
+
+
+def _queue(tmp_path, units=1, max_attempts=3, retry_backoff=0):
+    queue = SQLiteWorkQueue(str(tmp_path / 'queue.db'), retry_backoff=retry_backoff)
+    queue.enqueue('B07L1SP25K', 'amazon', URL, [{'start_page': i} for i in range(1, units + 1)], max_attempts)
+    return queue
+
+
+def _status(queue):
+    return {product: summary['units'] for product, summary in queue.stats().items()}['B07L1SP25K']
+
+
+def test_late_complete_is_not_undone_by_reclaiming_worker(tmp_path):
+    queue = _queue(tmp_path)
+    unit = queue.claim('w1', lease_seconds=0.01)
+    time.sleep(0.05)
+    reclaimed = queue.claim('w2', lease_seconds=60)
+    assert reclaimed['id'] == unit['id']
+    queue.complete(unit, 'w1', [REVIEW])
+    queue.fail(reclaimed, 'w2', RuntimeError('captcha'))
+    assert _status(queue) == {'done': 1}
+    assert not queue.heartbeat(unit['id'], 'w2')
+    assert queue.claim('w3') is None
+    assert len(queue.results('B07L1SP25K')) == 1
+
+
+def test_failed_unit_waits_for_backoff(tmp_path):
+    queue = _queue(tmp_path, retry_backoff=60)
+    unit = queue.claim('w1')
+    queue.fail(unit, 'w1', RuntimeError('setup_failed'))
+    assert _status(queue) == {'pending': 1}
+    assert queue.claim('w1') is None
+
+
+def test_unit_fails_after_max_attempts(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2)
+    for _ in range(2):
+        unit = queue.claim('w1')
+        assert unit is not None
+        queue.fail(unit, 'w1', RuntimeError('setup_failed'))
+    assert _status(queue) == {'failed': 1}
+    assert queue.claim('w1') is None
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    queue = _queue(tmp_path)
+    unit = queue.claim('w1', lease_seconds=0.01)
+    time.sleep(0.05)
+    reclaimed = queue.claim('w2')
+    assert reclaimed['id'] == unit['id'] and reclaimed['attempts'] == 2
+    assert not queue.heartbeat(unit['id'], 'w1')
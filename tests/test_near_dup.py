@@ -0,0 +1,69 @@
+import random
+
+from near_dup import MinHashLSH, lsh_params
+from review_store import ReviewStore
+
+THRESHOLD = 0.8
+
+
+def _documents(count=200, length=200, seed=7):
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(50000)]
+    return [rng.sample(vocabulary, length) for _ in range(count)]
+
+
+def _truncated(words, jaccard):
+    """Prefix of words whose 3-gram shingle set has the given Jaccard similarity to the full text."""
+    keep = round(jaccard * (len(words) - 2)) + 2
+    return ' '.join(words[:keep])
+
+
+def test_lsh_midpoint_below_threshold():
+    bands, rows = lsh_params(THRESHOLD, 128)
+    assert bands * rows <= 128
+    assert (1 / bands) ** (1 / rows) < THRESHOLD
+
+
+def test_candidate_recall_at_threshold():
+    lsh = MinHashLSH(THRESHOLD)
+    docs = _documents()
+    for i, words in enumerate(docs):
+        lsh.add(i, ' '.join(words))
+    hasher = lsh.hasher
+    found = 0
+    for i, words in enumerate(docs):
+        keys = hasher.band_keys(hasher.signature(_truncated(words, THRESHOLD)))
+        found += any(i in lsh.buckets[band].get(key, ()) for band, key in enumerate(keys))
+    assert found / len(docs) >= 0.8
+
+
+def test_query_recall_above_threshold():
+    lsh = MinHashLSH(THRESHOLD)
+    docs = _documents(seed=11)
+    for i, words in enumerate(docs):
+        lsh.add(i, ' '.join(words))
+    found = sum(any(key == i for key, _ in lsh.query(_truncated(words, 0.9))) for i, words in enumerate(docs))
+    assert found / len(docs) >= 0.95
+
+
+def test_unrelated_texts_do_not_match():
+    lsh = MinHashLSH(THRESHOLD)
+    docs = _documents(count=50, seed=3)
+    for i, words in enumerate(docs):
+        assert lsh.add(i, ' '.join(words)) == []
+
+
+def test_reindex_links_near_duplicates(tmp_path):
+    store = ReviewStore(str(tmp_path / 'reviews.db'))
+    words = _documents(count=1)[0]
+    store.add_reviews([{'text': ' '.join(words)}], 'moisturizer', 'influenster')
+    store.add_reviews([{'text': _truncated(words, 0.9)}], 'moisturizer-tube', 'influenster')
+    # Simulate reviews stored before near-duplicate indexing
+    with store._conn:
+        for table in ('near_duplicates', 'lsh_buckets', 'review_minhash'):
+            store._conn.execute(f'DELETE FROM {table}')
+    assert store.duplicate_clusters() == []
+    assert store.reindex_near_duplicates() == 2
+    clusters = store.duplicate_clusters()
+    assert len(clusters) == 1 and clusters[0]['size'] == 2
+    store.close()